@@ -1,4 +1,5 @@
 from decimal import *
+from math import isqrt
 
 """
 sources: https://en.wikipedia.org/wiki/Beatty_sequence
@@ -52,32 +53,128 @@ We can evaluate the sum() call to get a basic recursive expression:
 This expression makes up the logic behind the bigSum() method. Using the Decimal class, we can manipulate
 values with >100 digits without losing precision. 
 
+beattySum()
+
+    bigSum() is stuck with a fixed 500 digit context, so it breaks down once n gets past ~10^100, and
+    every level of the recursion recomputes sqrt(2) and hands back a Decimal. We never actually need
+    sqrt(2) itself though, only c = floor(n(r - 1)) = floor(nr) - n, and floor(nr) = floor(sqrt(2n^2))
+    is exactly the integer square root of 2n^2. math.isqrt() gives us that for integers of any length,
+    so the precision grows with the input for free. Since each level only adds or subtracts the next
+    one, the recursion unrolls into a loop that flips the sign of each term as it goes. Python 3.11
+    won't turn a string of more than 4300 digits into an int though, so readNumber() reads a plain
+    string of digits through Decimal instead, which is exact for any length and has no such limit,
+    and leaves everything else to int() (so "5.9" or "1e2" are still turned down). solution() uses
+    it unless it is asked for algorithm="decimal".
+
+solution_batch()
+
+    When we are handed a whole batch of n values, it works out sqrt(2) - 1 once, as the integer
+    root = floor((sqrt(2) - 1) * 2^K) with K bits for the largest input. Each chain cuts it down to
+    r = root >> (K - k), with k = 2b + 4 bits for the b bits of its first n, and every level then
+    takes c = floor(n(r - 1)) as n * r >> k, one multiplication and a shift instead of an isqrt().
+    That is always exact: the bits cut off put it off by less than n / 2^k < 1/(3n), and
+    n(r - 1) is never that close to an integer, since |n*sqrt(2) - m| > 1/(3n) for every integer m.
+
+    Sorting the inputs also lets chainSum() stop as soon as it runs into the chain of the input
+    before it, since nearby inputs end up on the same small c values, and two chains that share a
+    value share everything below it. It only checks the value the last chain had on the same level,
+    so it only catches chains that line up level by level, which nearby inputs usually do. A chain
+    that meets the last one on a different level (2 and 5 give [2] and [5, 2]) just runs down to the
+    bottom on its own, which costs a few levels but never changes the sum. Only that one chain is
+    kept, so the memory it uses never grows past a few hundred values however big the batch is. The
+    results are handed back in the original input order as soon as they are ready.
 
 """
 
+# Set by foobar.instrument, counts how many levels beattySum() walks down.
+probe = None
+
+
+def readNumber(s):
+    if isinstance(s, str) and s.isascii() and s.strip().isdigit():
+        return int(Decimal(s))
+    return int(s) # anything but plain digits is int()'s to take or turn down
+
+
 def bigSum(index):
     if index == 0:
         return 0
     getcontext().prec = 500
     cIndex = int((Decimal(2).sqrt() - 1) * index)
     totalIndex = index+cIndex
-    return (totalIndex) * (totalIndex+1)/2 - bigSum(cIndex) - cIndex*(cIndex+1)
-
-
-def solution(s):
-    return bigSum(int(s))
-
-
-print(solution(str(5)))
-
-
-print("3656251862507334448148179357411972294813205338243570072399608556509885357" +
-"2501592156627075023977411067341589424590108494452342577069275381301528664" +
-"8713467314724409580700486858456282969735344383354280498317253684972423688" +
-"0399137190063559454262133821524826418317800715699648839069268323667413740" +
-"3742614331223435935402453035423695823538445283290619837000290506129738885" +
-"5837817678284818646327428940940798745085837091696852308958883678563866545" +
-"5192211168001061493525287792007324647921921998049795017289928866989976959" +
-"3068942778535840280145136631201950415699342212774262487665784007034469384" +
-"2275855344226240937331812480075580")
-
+    return (totalIndex) * (totalIndex+1)//2 - bigSum(cIndex) - cIndex*(cIndex+1)
+
+
+def beattySum(index):
+    total = 0
+    sign = 1
+    while index > 0:
+        if probe:
+            probe.count("beattyLevels")
+        cIndex = isqrt(2 * index * index) - index
+        totalIndex = index + cIndex
+        total += sign * (totalIndex * (totalIndex + 1) // 2 - cIndex * (cIndex + 1))
+        sign = -sign
+        index = cIndex
+    return total
+
+
+def chainSum(index, last, root, rootBits):
+    k = 2 * index.bit_length() + 4 # enough bits for every value in this chain
+    r = root >> (rootBits - k)
+    chain = []
+    level = 0
+    while index > 0 and (level >= len(last) or last[level][0] != index):
+        chain.append(index)
+        index = index * r >> k
+        level += 1
+    tail = last[level:] if index else []
+    total = tail[0][1] if tail else 0
+    cIndex = index
+    solved = []
+    for index in reversed(chain):
+        totalIndex = index + cIndex
+        total = totalIndex * (totalIndex + 1) // 2 - cIndex * (cIndex + 1) - total
+        solved.append((index, total))
+        cIndex = index
+    solved.reverse()
+    return total, solved + tail
+
+
+ALGORITHMS = ("integer", "decimal")
+
+
+def solution(s, algorithm="integer"):
+    if algorithm not in ALGORITHMS:
+        raise ValueError("unknown algorithm %r, expected one of: %s" % (algorithm, ", ".join(ALGORITHMS)))
+    if algorithm == "decimal":
+        return bigSum(readNumber(s))
+    return beattySum(readNumber(s))
+
+
+def solution_batch(strs):
+    values = [readNumber(s) for s in strs]
+    order = sorted(range(len(values)), key=values.__getitem__)
+    rootBits = 2 * max(values, default=0).bit_length() + 4
+    root = isqrt(2 << 2 * rootBits) - (1 << rootBits)
+    last = []
+    results = [None] * len(values)
+    ready = 0
+    for i in order:
+        results[i], last = chainSum(values[i], last, root, rootBits)
+        while ready < len(values) and results[ready] is not None:
+            yield results[ready]
+            ready += 1
+
+
+if __name__ == "__main__":
+    print(solution(str(5)))
+    print("3656251862507334448148179357411972294813205338243570072399608556509885357" +
+          "2501592156627075023977411067341589424590108494452342577069275381301528664" +
+          "8713467314724409580700486858456282969735344383354280498317253684972423688" +
+          "0399137190063559454262133821524826418317800715699648839069268323667413740" +
+          "3742614331223435935402453035423695823538445283290619837000290506129738885" +
+          "5837817678284818646327428940940798745085837091696852308958883678563866545" +
+          "5192211168001061493525287792007324647921921998049795017289928866989976959" +
+          "3068942778535840280145136631201950415699342212774262487665784007034469384" +
+          "2275855344226240937331812480075580")
@@ -1,5 +1,6 @@
 import collections
 import fractions
+import math
 
 '''
 Sources used for this solution:
@@ -61,9 +62,72 @@ equalize()
     between the denominators, we use euclid's method and multiply each fraction in our array
     by this value. Finally, we have our output.
 
+getA0() and eliminate()
+
+    Inverting [Identity - Q] with cofactors means a determinant for every cell, and getD() expands
+    each of those recursively, so the work grows with n! and falls over past ~10 transient states.
+    Working in floats and patching the result with limit_denominator() can also land on the wrong
+    fraction. We never needed the whole inverse anyway, only row 0 of F * R. That row is x * R where
+    x is the solution of [Identity - Q]^T * x = e0, a single linear system. Writing Q as the counts C
+    divided by the row totals D, we can substitute y = x / D and solve (D - C)^T * y = e0 instead,
+    which only has integers in it, and then row 0 of F * R is simply y * (the absorbing counts).
+    getA0() builds that system straight from m, and eliminate() solves it with Bareiss's
+    fraction-free elimination: every entry it produces is a minor of the original matrix, so the
+    integers stay small and each division is exact. Only the final back substitution uses Fractions.
+    The cost is polynomial in the number of states and every probability comes out exact. If s0 is
+    itself terminal, the ore never moves, so it lands in s0 with probability 1. solution() uses this
+    unless it is asked for another algorithm: "sparse", "scc" and "modular" below, or "cofactor" for
+    the original inverse.
+
+getCSR(), sparseA0() and sparseEliminate()
+
+    Real ore chains only have a handful of transitions out of each state, so most of Q and R is
+    zeros. getCSR() packs m into compressed sparse rows: for each state, the columns it moves to and
+    how many times, with indptr marking where each state's transitions start and end. sparseA0()
+    builds the same (D - C)^T * y = e0 system as getA0(), but keeps each row as a dict of its
+    nonzero cells and never builds Q or R, and sparseEliminate() solves it. Since every state can
+    reach a terminal state, the system's diagonal dominates and elimination never runs into a zero
+    pivot, so we can go straight down the diagonal and only touch the rows that actually have a
+    nonzero in the pivot column (colRows keeps track of those as fill-in appears). Each of those rows
+    is cross multiplied with the pivot row so everything stays an integer, then divided by the gcd of
+    its cells to keep the numbers from growing. Time and memory follow the number of transitions
+    (plus fill-in) instead of states^2.
+
+getComponents() and sccA0()
+
+    Plenty of transient states can never be reached from s0, and the rest usually fall into small
+    groups that feed into each other in one direction only. getComponents() runs Tarjan's algorithm
+    (with an explicit stack, so long chains don't hit the recursion limit) starting from s0 over the
+    CSR transitions. That only ever visits states reachable from s0, and hands back their strongly
+    connected components in topological order. sccA0() then walks the components in that order:
+    everything that can flow into a component has already been solved, so the expected visits
+    arriving from earlier components (plus the single starting visit into s0) become the right hand
+    side of a small system over just that component, which sparseEliminate() solves. The visits then flow
+    on to later components and terminal states. Wide chains turn into lots of tiny systems, so the
+    work is close to linear in the number of transitions.
+
+modularA0(), modFactor() and modSolve()
+
+    On big chains the exact answers have hundreds of digits, and every elimination step above drags
+    numbers that size around, and equalize() then folds the denominators together one at a time.
+    modularA0() keeps the work at word size instead. modFactor() eliminates the same integer
+    system once modulo a prime just under 2^31 (modularPrimes() moves on to the next prime in the
+    rare case a pivot vanishes modulo p), writing down every row operation it makes, and modSolve()
+    replays those operations on any right hand side. Solving a * x = r modulo p gives the lowest
+    base p digit of y, and (r - a * x) / p is an exact integer division that leaves the system
+    for the remaining digits, so every further digit costs one modSolve() and one pass over the
+    matrix, and never another elimination. After enough digits, reconstruct() turns y modulo p^k
+    back into fractions with one common denominator, using rationalReconstruct() (the extended
+    euclidean algorithm stopped halfway) on whichever entry still needs a bigger denominator.
+    Since the system only has the one solution, checking a * nums = denom * b with integers proves
+    the answer right, and if the check fails we just keep adding digits. The absorbing counts turn
+    nums straight into the output numerators, and a single gcd reduces them with the denominator.
 
 '''
 
+# Set by foobar.instrument, counts the row updates sparseEliminate() does.
+probe = None
+
 
 def fractinate(m):
     return [fractions.Fraction(cell).limit_denominator() for cell in m]
@@ -81,14 +145,14 @@ def getT(m):
 def getR(m, t):
     height = len(m)
     width = len(m[0])
-    correct = [i for i, j in zip(range(width), t) if not j]
+    correct = {i for i, j in zip(range(width), t) if not j}
     return [[m[row][col] for col in range(width) if col in correct] for row in range(height)]
 
 
 def getQ(m, t):
     height = len(m)
     width = len(m[0])
-    correct = [i for i, j in zip(range(width), t) if j]
+    correct = {i for i, j in zip(range(width), t) if j}
     return [[m[row][col] for col in range(width) if col in correct] for row in range(height)]
 
 
@@ -125,7 +189,7 @@ def getI(m):
         return [[m[1][1] / determinant, -1 * m[0][1] / determinant],
                 [-1 * m[1][0] / determinant, m[0][0] / determinant]]
     c = [[((-1) ** (row + col)) * getD(cutMatrix(m, row, col)) for col in range(size)] for row in range(size)]
-    c = map(list, zip(*c))
+    c = list(map(list, zip(*c)))
     size = len(c)
     return [[c[row][col] / determinant for col in range(size)] for row in range(size)]
 
@@ -144,15 +208,365 @@ def getF(q):
 def equalize(l):
     denom = 1
     for num in [frac.denominator for frac in l]:
-        denom = denom * num // fractions.gcd(denom, num)
+        denom = denom * num // math.gcd(denom, num)
     l = [(frac * denom).numerator for frac in l]
     l.append(denom)
     return l
 
 
-def solution(m):
+def eliminate(a):
+    size = len(a)
+    previous = 1
+    for k in range(size):
+        pivot = next(row for row in range(k, size) if a[row][k] != 0)
+        a[k], a[pivot] = a[pivot], a[k]
+        lead = a[k]
+        for row in a[k + 1:]:
+            factor = row[k]
+            for col in range(k + 1, size + 1):
+                row[col] = (row[col] * lead[k] - factor * lead[col]) // previous
+            row[k] = 0
+        previous = lead[k]
+    x = [fractions.Fraction(0)] * size
+    for k in reversed(range(size)):
+        rest = sum((a[k][col] * x[col] for col in range(k + 1, size) if a[k][col]), fractions.Fraction(0))
+        x[k] = (a[k][size] - rest) / a[k][k]
+    return x
+
+
+def getA0(m):
+    t = getT(m)
+    transient = [i for i, j in enumerate(t) if j]
+    absorbing = [i for i, j in enumerate(t) if not j]
+    if not t[0]:
+        return [fractions.Fraction(int(state == 0)) for state in absorbing]
+    index = {state: i for i, state in enumerate(transient)}
+    size = len(transient)
+    a = [[0] * size + [int(row == 0)] for row in range(size)]
+    for state in transient:
+        a[index[state]][index[state]] += sum(m[state])
+        for col, count in enumerate(m[state]):
+            if count and col in index:
+                a[index[col]][index[state]] -= count
+    y = eliminate(a)
+    return [sum((y[index[state]] * m[state][col] for state in transient if m[state][col]), fractions.Fraction(0))
+            for col in absorbing]
+
+
+def getCSR(m):
+    indptr = [0]
+    cols = []
+    counts = []
+    for row in m:
+        for col, count in enumerate(row):
+            if count:
+                cols.append(col)
+                counts.append(count)
+        indptr.append(len(cols))
+    return indptr, cols, counts
+
+
+def sparseEliminate(a, b):
+    colRows = [set() for _ in a]
+    for i, row in enumerate(a):
+        for col in row:
+            colRows[col].add(i)
+    for k in range(len(a)):
+        lead = a[k]
+        for i in colRows[k]:
+            row = a[i]
+            if i <= k or not row.get(k):
+                continue
+            if probe:
+                probe.count("rowEliminations")
+            factor = row.pop(k)
+            for col in row:
+                row[col] *= lead[k]
+            for col, cell in lead.items():
+                if col > k:
+                    if col not in row:
+                        colRows[col].add(i)
+                    row[col] = row.get(col, 0) - factor * cell
+            b[i] = b[i] * lead[k] - factor * b[k]
+            content = math.gcd(b[i], *row.values())
+            if content > 1:
+                for col in row:
+                    row[col] //= content
+                b[i] //= content
+    y = [fractions.Fraction(0)] * len(a)
+    for k in reversed(range(len(a))):
+        rest = sum((cell * y[col] for col, cell in a[k].items() if col > k), fractions.Fraction(0))
+        y[k] = (b[k] - rest) / a[k][k]
+    return y
+
+
+def sparseSystem(csr):
+    indptr, cols, counts = csr
+    transient = [state for state in range(len(indptr) - 1) if indptr[state + 1] > indptr[state]]
+    index = {state: i for i, state in enumerate(transient)}
+    a = [{i: 0} for i in range(len(transient))]
+    b = [int(i == 0) for i in range(len(transient))]
+    for state in transient:
+        i = index[state]
+        for k in range(indptr[state], indptr[state + 1]):
+            a[i][i] += counts[k]
+            if cols[k] in index:
+                j = index[cols[k]]
+                a[j][i] = a[j].get(i, 0) - counts[k]
+    return transient, index, a, b
+
+
+def sparseA0(csr):
+    indptr, cols, counts = csr
+    size = len(indptr) - 1
+    if indptr[1] == indptr[0]:
+        return [fractions.Fraction(int(state == 0)) for state in range(size) if indptr[state + 1] == indptr[state]]
+    transient, index, a, b = sparseSystem(csr)
+    y = sparseEliminate(a, b)
+    probs = {}
+    for state in transient:
+        for k in range(indptr[state], indptr[state + 1]):
+            if cols[k] not in index:
+                probs[cols[k]] = probs.get(cols[k], 0) + y[index[state]] * counts[k]
+    return [fractions.Fraction(probs.get(state, 0)) for state in range(size) if indptr[state + 1] == indptr[state]]
+
+
+def getComponents(csr):
+    indptr, cols, counts = csr
+    index = {0: 0}
+    low = {0: 0}
+    stack = [0]
+    onStack = {0}
+    work = [(0, indptr[0])]
+    components = []
+    while work:
+        state, k = work[-1]
+        if k < indptr[state + 1]:
+            work[-1] = (state, k + 1)
+            nextState = cols[k]
+            if indptr[nextState + 1] == indptr[nextState]:
+                continue
+            if nextState not in index:
+                index[nextState] = low[nextState] = len(index)
+                stack.append(nextState)
+                onStack.add(nextState)
+                work.append((nextState, indptr[nextState]))
+            elif nextState in onStack:
+                low[state] = min(low[state], index[nextState])
+            continue
+        work.pop()
+        if work:
+            parent = work[-1][0]
+            low[parent] = min(low[parent], low[state])
+        if low[state] == index[state]:
+            component = []
+            while True:
+                member = stack.pop()
+                onStack.discard(member)
+                component.append(member)
+                if member == state:
+                    break
+            components.append(component)
+    components.reverse()
+    return components
+
+
+def sccA0(csr):
+    indptr, cols, counts = csr
+    size = len(indptr) - 1
+    absorbing = [state for state in range(size) if indptr[state + 1] == indptr[state]]
+    if indptr[1] == indptr[0]:
+        return [fractions.Fraction(int(state == 0)) for state in absorbing]
+    inflow = {0: fractions.Fraction(1)}
+    probs = {}
+    for component in getComponents(csr):
+        local = {state: i for i, state in enumerate(component)}
+        denom = math.lcm(*(inflow.get(state, fractions.Fraction(0)).denominator for state in component))
+        a = [{i: 0} for i in range(len(component))]
+        b = [int(inflow.get(state, 0) * denom) for state in component]
+        for state in component:
+            i = local[state]
+            for k in range(indptr[state], indptr[state + 1]):
+                a[i][i] += counts[k]
+                if cols[k] in local:
+                    j = local[cols[k]]
+                    a[j][i] = a[j].get(i, 0) - counts[k]
+        y = sparseEliminate(a, b)
+        for state, visits in zip(component, y):
+            visits /= denom
+            for k in range(indptr[state], indptr[state + 1]):
+                nextState = cols[k]
+                if nextState in local:
+                    continue
+                if indptr[nextState + 1] == indptr[nextState]:
+                    probs[nextState] = probs.get(nextState, 0) + visits * counts[k]
+                else:
+                    inflow[nextState] = inflow.get(nextState, 0) + visits * counts[k]
+    return [fractions.Fraction(probs.get(state, 0)) for state in absorbing]
+
+
+def isPrime(n):
+    for small in (2, 3, 5, 7, 61):
+        if n % small == 0:
+            return n == small
+    d, shifts = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        shifts += 1
+    for base in (2, 7, 61):
+        x = pow(base, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(shifts - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def modularPrimes():
+    n = 2 ** 31 - 1
+    while True:
+        if isPrime(n):
+            yield n
+        n -= 2
+
+
+def modFactor(a, p):
+    a = [{col: cell % p for col, cell in row.items()} for row in a]
+    colRows = [set() for _ in a]
+    for i, row in enumerate(a):
+        for col in row:
+            colRows[col].add(i)
+    steps = []
+    inverses = []
+    for k in range(len(a)):
+        lead = a[k]
+        if not lead[k]:
+            return None
+        inverse = pow(lead[k], -1, p)
+        inverses.append(inverse)
+        ops = []
+        for i in colRows[k]:
+            row = a[i]
+            if i <= k or not row.get(k):
+                continue
+            factor = row.pop(k) * inverse % p
+            ops.append((i, factor))
+            for col, cell in lead.items():
+                if col > k:
+                    if col not in row:
+                        colRows[col].add(i)
+                    row[col] = (row.get(col, 0) - factor * cell) % p
+        steps.append(ops)
+    upper = [[(col, cell) for col, cell in row.items() if col > k] for k, row in enumerate(a)]
+    return steps, upper, inverses
+
+
+def modSolve(factors, b, p):
+    steps, upper, inverses = factors
+    b = [cell % p for cell in b]
+    for k, ops in enumerate(steps):
+        if b[k]:
+            for i, factor in ops:
+                b[i] = (b[i] - factor * b[k]) % p
+    y = [0] * len(b)
+    for k in reversed(range(len(b))):
+        y[k] = (b[k] - sum(cell * y[col] for col, cell in upper[k])) * inverses[k] % p
+    return y
+
+
+def rationalReconstruct(r, modulus, bound):
+    oldR, newR = modulus, r
+    oldT, newT = 0, 1
+    while newR > bound:
+        quotient = oldR // newR
+        oldR, newR = newR, oldR - quotient * newR
+        oldT, newT = newT, oldT - quotient * newT
+    if abs(newT) > bound or math.gcd(newR, newT) != 1:
+        return None
+    return (newR, newT) if newT > 0 else (-newR, -newT)
+
+
+def reconstruct(residues, modulus):
+    bound = math.isqrt(modulus // 2)
+    denom = 1
+    nums = []
+    for r in residues:
+        num = r * denom % modulus
+        if num > modulus // 2:
+            num -= modulus
+        if abs(num) > bound:
+            frac = rationalReconstruct(num % modulus, modulus, bound)
+            if frac is None:
+                return None
+            num, extra = frac
+            denom *= extra
+            if denom > bound:
+                return None
+            nums = [other * extra for other in nums]
+        nums.append(num)
+    return nums, denom
+
+
+def modularA0(csr):
+    indptr, cols, counts = csr
+    absorbing = [state for state in range(len(indptr) - 1) if indptr[state + 1] == indptr[state]]
+    if indptr[1] == indptr[0]:
+        return [int(state == 0) for state in absorbing] + [1]
+    transient, index, a, b = sparseSystem(csr)
+    primes = modularPrimes()
+    factors = None
+    while factors is None:
+        p = next(primes)
+        factors = modFactor(a, p)
+    residues = [0] * len(a)
+    modulus = 1
+    r = list(b)
+    digits, checkAt = 0, 1
+    while True:
+        x = modSolve(factors, r, p)
+        residues = [res + modulus * cell for res, cell in zip(residues, x)]
+        modulus *= p
+        digits += 1
+        r = [(cell - sum(coef * x[col] for col, coef in row.items())) // p for cell, row in zip(r, a)]
+        if digits < checkAt:
+            continue
+        checkAt = digits + max(1, digits // 4)
+        candidate = reconstruct(residues, modulus)
+        if candidate is None:
+            continue
+        nums, denom = candidate
+        if all(sum(cell * nums[col] for col, cell in row.items()) == denom * b[i] for i, row in enumerate(a)):
+            break
+    probs = {}
+    for state in transient:
+        for k in range(indptr[state], indptr[state + 1]):
+            if cols[k] not in index:
+                probs[cols[k]] = probs.get(cols[k], 0) + nums[index[state]] * counts[k]
+    out = [probs.get(state, 0) for state in absorbing] + [denom]
+    content = math.gcd(*out)
+    return [cell // content for cell in out]
+
+
+ALGORITHMS = ("elimination", "sparse", "scc", "modular", "cofactor")
+
+
+def solution(m, algorithm="elimination"):
+    if algorithm not in ALGORITHMS:
+        raise ValueError("unknown algorithm %r, expected one of: %s" % (algorithm, ", ".join(ALGORITHMS)))
     if len(m) == 1 and len(m[0]) == 1:
         return [1, 1]
+    if algorithm == "elimination":
+        return equalize(getA0(m))
+    if algorithm == "sparse":
+        return equalize(sparseA0(getCSR(m)))
+    if algorithm == "scc":
+        return equalize(sccA0(getCSR(m)))
+    if algorithm == "modular":
+        return modularA0(getCSR(m))
     t = getT(m)
     pMatrix = getP(m)
     r = getR(pMatrix, t)
@@ -160,6 +574,3 @@ def solution(m):
     f = getF(q)
     fin = fractinate(multiply(f, r)[0])
     return equalize(fin)
-
- 
-
@@ -21,7 +21,17 @@
         flow to the old sources equal to their outflow (using getCapacity()), and our new sinks will
         receive from the old sinks equal to their inflow (using getInflow()). First, we resize our paths
         matrix, using addRoom(), to accomodate the new source/sink, and then update the new source / old
-        sinks according to the conservation rule.
+        sinks according to the conservation rule. addRoom() builds a new matrix rather than inserting
+        into the rows of the one it's given, so the caller's paths are left alone.
+
+    getNetwork()/addTerminals()
+
+        The engines below don't need to resize anything. getNetwork() turns the paths matrix into a
+        residual graph once, with two extra rooms at the end (index len(paths) for the source and
+        len(paths) + 1 for the sink), so every real room keeps its own index. addTerminals() then hooks
+        a set of entrances and exits up to those two rooms for a single query. It only copies the flat
+        edge lists and the room lists it adds to, never the matrix or the base graph, so the same
+        network can be reused for as many entrance/exit queries as we like.
 
     solution()
 
@@ -48,8 +58,67 @@
             and adding the same value in the opposite direction. We do this by iterating through the path that
             we took, and subtracting/adding from/to paths[] using the room numbers as indices.
 
+    dinic() and pushRelabel()
+
+        search() hands back the rooms in the order it visited them rather than an actual path from the
+        source to the sink, and takes the smallest of every corridor it looked at, so each augmentation
+        can be wrong, and every step scans the whole matrix. For corridor graphs with thousands of rooms
+        and huge capacities we want the number of rounds to not depend on the capacities at all.
+        Both engines work on a residual graph kept as adjacency lists (getNetwork()): every corridor is a
+        pair of edges, the corridor and its reverse, stored next to each other so edge e's reverse is
+        always e ^ 1, and pushing flow along one gives the same amount of room back on the other.
+
+        dinic() runs a breadth-first search from the source to label every room with its distance, and
+        then only pushes flow along corridors that go exactly one level further (the level graph).
+        A depth-first search keeps finding paths in that level graph, remembering how far it got through
+        each room's corridors so dead ends are never retried, until the level graph is blocked. Then it
+        rebuilds the levels. The sink gets strictly further away every round, so there are at most V
+        rounds.
+
+        pushRelabel() instead floods as much as it can out of the source right away and lets each room
+        hold on to its extra bunnies (excess). A room can only push downhill to a neighbour one height
+        below it; when it can't push anymore it raises its height (relabel) just above its lowest
+        neighbour. Rooms start at their distance from the sink, and when no room is left at some height
+        every room above it is cut off from the sink, so they all jump straight above the source (the
+        gap heuristic) and send their extra back. What ends up at the sink is the max flow.
+
+        solution() picks between these with its algorithm parameter ("dinic", "push-relabel", or "dfs"
+        for the original search()).
+
+    FlowNetwork
+
+        When only a few corridors change, most of the flow we already found is still good, so
+        FlowNetwork keeps its residual graph around between calls. set_capacity() on a corridor that
+        is carrying no more than its new capacity just changes how much room is left on it. If the
+        corridor is now carrying too much, we take the extra off it and first try to send that extra
+        around the corridor through the residual graph (dinic() with a limit, from one end of the
+        corridor to the other). Whatever can't be rerouted is sent back from the corridor to the
+        source and from the sink back to the corridor, which cancels it along the paths it came
+        from. Either way we are left with a valid flow, and one more dinic() run from the source
+        tops it back up to the max flow. An entrance's or exit's link to the source or sink is resized
+        the same way whenever one of its corridors changes. add_entrance() and add_exit() link a new
+        room up and top the flow up again.
+
+    flowReport()
+
+        The residual graph left behind by any of the engines already tells us where the bunnies go and
+        where the bottlenecks are. getFlows() reads off how many bunnies each corridor carries as its
+        capacity minus whatever room is left on it. getMinCut() finds every room the source can still
+        reach in the residual graph. Every corridor leading out of that set is full, and together those
+        corridors add up to exactly the max flow, so they are the bottleneck. Entrances are always
+        counted on the source's side and exits on the sink's side, which can only make the cut
+        smaller, so the cut is made up of real corridors and never the made-up links to the source
+        or the sink. flowReport() (and FlowNetwork.report()) hands back the max flow, the per-corridor
+        flows and the min cut from a single run of "dinic" or "push-relabel" (search() leaves no
+        residual graph behind to read).
+
 """
 
+from collections import deque
+
+# Set by foobar.instrument; while it's None the loops below only pay for one falsy check.
+probe = None
+
 
 def getCapacity(paths, room):
     return sum(paths[room])
@@ -64,18 +133,13 @@ def getInflow(paths, toRoom):
 
 def addRoom(m, i):
     if i == 0:
-        for row in m:
-            row.insert(0, 0)
-        m.insert(0, [0] * len(m[0]))
-    elif i == 1:
-        for row in m:
-            row.append(0)
-        m.append([0] * len(m[0]))
-    return m
+        return [[0] * (len(m[0]) + 1)] + [[0] + row for row in m]
+    return [row + [0] for row in m] + [[0] * (len(m[0]) + 1)]
 
 
 def oneEntrance(paths, entrances):
     paths = addRoom(paths, 0)
+    entrances = set(entrances)
     for i in range(len(paths)):
         if i in entrances:
             paths[0][i] = getCapacity(paths, i)
@@ -84,6 +148,7 @@ def oneEntrance(paths, entrances):
 
 def oneExit(paths, exits):
     paths = addRoom(paths, 1)
+    exits = set(exits)
     for i in range(len(paths)):
         if i in exits:
             paths[i][-1] = getInflow(paths, i)
@@ -115,7 +180,272 @@ def updateResidual(m, flow, pathTaken):
     return m
 
 
-def solution(entrances, exits, paths):
+def addEdge(graph, fromRoom, toRoom, capacity):
+    adj, to, cap = graph
+    adj[fromRoom].append(len(to))
+    to.append(toRoom)
+    cap.append(capacity)
+    adj[toRoom].append(len(to))
+    to.append(fromRoom)
+    cap.append(0)
+
+
+def getNetwork(m):
+    graph = ([[] for _ in range(len(m) + 2)], [], [])
+    for fromRoom, row in enumerate(m):
+        for toRoom, capacity in enumerate(row):
+            if capacity > 0 and fromRoom != toRoom:
+                addEdge(graph, fromRoom, toRoom, capacity)
+    return graph
+
+
+def addTerminals(network, entrances, exits):
+    adj, to, cap = network
+    source = len(adj) - 2
+    sink = len(adj) - 1
+    graph = (list(adj), list(to), list(cap))
+    for room in set(entrances) | set(exits) | {source, sink}:
+        graph[0][room] = list(adj[room])
+    for room in entrances:
+        addEdge(graph, source, room, sum(cap[edge] for edge in adj[room] if edge % 2 == 0))
+    for room in exits:
+        addEdge(graph, room, sink, sum(cap[edge ^ 1] for edge in adj[room] if edge % 2 == 1))
+    return graph, source, sink
+
+
+def getLevels(graph, source):
+    adj, to, cap = graph
+    level = [-1] * len(adj)
+    level[source] = 0
+    queue = deque([source])
+    while queue:
+        room = queue.popleft()
+        for edge in adj[room]:
+            if cap[edge] > 0 and level[to[edge]] < 0:
+                level[to[edge]] = level[room] + 1
+                queue.append(to[edge])
+    return level
+
+
+def dinic(graph, source, sink, limit=None):
+    adj, to, cap = graph
+    homeFree = 0
+    while source != sink and homeFree != limit:
+        level = getLevels(graph, source)
+        if level[sink] < 0:
+            return homeFree
+        if probe:
+            probe.count("levelGraphs")
+        nextEdge = [0] * len(adj)
+        pathTaken = []
+        room = source
+        while True:
+            if room == sink:
+                narrowestCorr = min(cap[edge] for edge in pathTaken)
+                if limit is not None:
+                    narrowestCorr = min(narrowestCorr, limit - homeFree)
+                for edge in pathTaken:
+                    cap[edge] -= narrowestCorr
+                    cap[edge ^ 1] += narrowestCorr
+                homeFree += narrowestCorr
+                if probe:
+                    probe.count("augmentingPaths")
+                if homeFree == limit:
+                    return homeFree
+                del pathTaken[next(i for i, edge in enumerate(pathTaken) if cap[edge] == 0):]
+                room = to[pathTaken[-1]] if pathTaken else source
+                continue
+            while nextEdge[room] < len(adj[room]):
+                edge = adj[room][nextEdge[room]]
+                if cap[edge] > 0 and level[to[edge]] == level[room] + 1:
+                    break
+                nextEdge[room] += 1
+            if nextEdge[room] < len(adj[room]):
+                pathTaken.append(adj[room][nextEdge[room]])
+                room = to[pathTaken[-1]]
+            elif room == source:
+                break
+            else:
+                level[room] = -1
+                pathTaken.pop()
+                room = to[pathTaken[-1]] if pathTaken else source
+                nextEdge[room] += 1
+
+
+def pushRelabel(graph, source, sink):
+    adj, to, cap = graph
+    size = len(adj)
+    height = [size] * size
+    height[sink] = 0
+    queue = deque([sink])
+    while queue:
+        room = queue.popleft()
+        for edge in adj[room]:
+            if cap[edge ^ 1] > 0 and height[to[edge]] == size:
+                height[to[edge]] = height[room] + 1
+                queue.append(to[edge])
+    height[source] = size
+    count = [0] * (2 * size + 1)
+    for h in height:
+        count[h] += 1
+    excess = [0] * size
+    nextEdge = [0] * size
+    active = deque()
+    for edge in adj[source]:
+        flow = cap[edge]
+        if flow > 0 and to[edge] != source:
+            cap[edge] -= flow
+            cap[edge ^ 1] += flow
+            if excess[to[edge]] == 0 and to[edge] != sink:
+                active.append(to[edge])
+            excess[to[edge]] += flow
+    while active:
+        room = active.popleft()
+        while excess[room] > 0:
+            if nextEdge[room] == len(adj[room]):
+                if probe:
+                    probe.count("relabels")
+                oldHeight = height[room]
+                count[oldHeight] -= 1
+                if count[oldHeight] == 0 and oldHeight < size:
+                    for other in range(size):
+                        if oldHeight < height[other] < size:
+                            count[height[other]] -= 1
+                            height[other] = size + 1
+                            count[size + 1] += 1
+                    height[room] = size + 1
+                else:
+                    height[room] = 1 + min(height[to[edge]] for edge in adj[room] if cap[edge] > 0)
+                count[height[room]] += 1
+                nextEdge[room] = 0
+                continue
+            edge = adj[room][nextEdge[room]]
+            toRoom = to[edge]
+            if cap[edge] > 0 and height[room] == height[toRoom] + 1:
+                if probe:
+                    probe.count("pushes")
+                flow = min(excess[room], cap[edge])
+                cap[edge] -= flow
+                cap[edge ^ 1] += flow
+                excess[room] -= flow
+                if excess[toRoom] == 0 and toRoom != source and toRoom != sink:
+                    active.append(toRoom)
+                excess[toRoom] += flow
+            else:
+                nextEdge[room] += 1
+    return excess[sink]
+
+
+ENGINES = {"dinic": dinic, "push-relabel": pushRelabel}
+
+
+def getFlows(graph, capacity, corridors):
+    adj, to, cap = graph
+    return {(to[edge ^ 1], to[edge]): capacity[edge] - cap[edge] for edge in corridors if capacity[edge] > cap[edge]}
+
+
+def getMinCut(graph, capacity, corridors, source, entrances, exits):
+    adj, to, cap = graph
+    level = getLevels(graph, source)
+    sourceSide = ({room for room, depth in enumerate(level) if depth >= 0} | set(entrances)) - set(exits)
+    return [(to[edge ^ 1], to[edge]) for edge in corridors
+            if capacity[edge] > 0 and to[edge ^ 1] in sourceSide and to[edge] not in sourceSide]
+
+
+def flowReport(entrances, exits, paths, algorithm="dinic"):
+    if algorithm not in ENGINES:
+        raise ValueError("unknown algorithm %r, expected one of: %s" % (algorithm, ", ".join(ENGINES)))
+    network = getNetwork(paths)
+    graph, source, sink = addTerminals(network, entrances, exits)
+    homeFree = ENGINES[algorithm](graph, source, sink)
+    corridors = range(0, len(network[1]), 2)
+    return (homeFree, getFlows(graph, network[2], corridors),
+            getMinCut(graph, network[2], corridors, source, entrances, exits))
+
+
+class FlowNetwork:
+
+    def __init__(self, paths, entrances=(), exits=()):
+        self.graph = getNetwork(paths)
+        self.capacity = list(self.graph[2])
+        self.source = len(paths)
+        self.sink = len(paths) + 1
+        self.corridors = {(self.graph[1][edge ^ 1], self.graph[1][edge]): edge
+                          for edge in range(0, len(self.capacity), 2)}
+        self.entrances = {}
+        self.exits = {}
+        self.flow = 0
+        for room in entrances:
+            self.add_entrance(room)
+        for room in exits:
+            self.add_exit(room)
+
+    def _addEdge(self, fromRoom, toRoom, capacity):
+        edge = len(self.capacity)
+        addEdge(self.graph, fromRoom, toRoom, capacity)
+        self.capacity += [capacity, 0]
+        return edge
+
+    def _outflow(self, room):
+        adj, to, cap = self.graph
+        return sum(self.capacity[edge] for edge in adj[room] if edge % 2 == 0 and to[edge] != self.sink)
+
+    def _inflow(self, room):
+        adj, to, cap = self.graph
+        return sum(self.capacity[edge ^ 1] for edge in adj[room] if edge % 2 == 1 and to[edge] != self.source)
+
+    def _resize(self, edge, capacity):
+        adj, to, cap = self.graph
+        fromRoom, toRoom = to[edge ^ 1], to[edge]
+        carried = self.capacity[edge] - cap[edge]
+        self.capacity[edge] = capacity
+        if carried <= capacity:
+            cap[edge] = capacity - carried
+            return
+        extra = carried - capacity
+        cap[edge] = 0
+        cap[edge ^ 1] = capacity
+        extra -= dinic(self.graph, fromRoom, toRoom, extra)
+        if extra:
+            dinic(self.graph, fromRoom, self.source, extra)
+            dinic(self.graph, self.sink, toRoom, extra)
+            self.flow -= extra
+
+    def set_capacity(self, fromRoom, toRoom, capacity):
+        if (fromRoom, toRoom) not in self.corridors:
+            self.corridors[(fromRoom, toRoom)] = self._addEdge(fromRoom, toRoom, 0)
+        self._resize(self.corridors[(fromRoom, toRoom)], capacity)
+        if fromRoom in self.entrances:
+            self._resize(self.entrances[fromRoom], self._outflow(fromRoom))
+        if toRoom in self.exits:
+            self._resize(self.exits[toRoom], self._inflow(toRoom))
+        self.flow += dinic(self.graph, self.source, self.sink)
+        return self.flow
+
+    def add_entrance(self, room):
+        if room not in self.entrances:
+            self.entrances[room] = self._addEdge(self.source, room, self._outflow(room))
+            self.flow += dinic(self.graph, self.source, self.sink)
+        return self.flow
+
+    def add_exit(self, room):
+        if room not in self.exits:
+            self.exits[room] = self._addEdge(room, self.sink, self._inflow(room))
+            self.flow += dinic(self.graph, self.source, self.sink)
+        return self.flow
+
+    def report(self):
+        corridors = list(self.corridors.values())
+        return (self.flow, getFlows(self.graph, self.capacity, corridors),
+                getMinCut(self.graph, self.capacity, corridors, self.source, self.entrances, self.exits))
+
+
+def solution(entrances, exits, paths, algorithm="dinic"):
+    if algorithm in ENGINES:
+        return ENGINES[algorithm](*addTerminals(getNetwork(paths), entrances, exits))
+    if algorithm != "dfs":
+        raise ValueError("unknown algorithm %r, expected one of: %s" % (algorithm, ", ".join(list(ENGINES) + ["dfs"])))
+    paths = [list(row) for row in paths]
     if len(entrances) > 1:
         entrances = [item + 1 for item in entrances]
         paths = oneEntrance(paths, entrances)
@@ -132,6 +462,8 @@ def solution(entrances, exits, paths):
         pathTaken = pathData[1]
         narrowestCorr = pathData[2]
         homeFree += narrowestCorr
+        if probe:
+            probe.count("augmentingPaths")
         paths = updateResidual(paths, narrowestCorr, pathTaken)
     return homeFree
 
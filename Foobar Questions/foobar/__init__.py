@@ -0,0 +1,93 @@
+"""
+
+    Every problem folder holds a standalone solution.py, and since the folder names have
+    dashes in them none of them can be imported the usual way. This package gives them one
+    front door.
+
+    load()
+
+        Imports a problem's solution.py as foobar.<problem_name> the first time it is asked for.
+        Nothing is loaded when the package itself is imported, so startup stays fast and no
+        solver runs any code until it is needed. SolutionFinder makes those names importable
+        like any other module, so a worker process started with spawn or forkserver (which
+        starts from a fresh interpreter) can unpickle a solver's functions by name.
+
+    solve()
+
+        Calls a problem's solution() with a list of positional arguments, a dict of keyword
+        arguments, or a single bare argument, plus any extra options such as algorithm.
+
+    readInt(), writeInt() and loads()
+
+        Python 3.11 refuses to turn an int of more than 4300 digits into a string or back, but
+        dodge-the-lasers and fuel-injection-perfection take and answer with numbers longer than
+        that. readInt() and writeInt() go through Decimal, which has no such limit, and loads()
+        reads JSON with readInt() for its numbers, so inputs of any length get in without
+        touching the limit, which is the whole interpreter's and not safe to flip from a thread.
+
+    anyDigits()
+
+        json.dumps() has no such hook, so writing out a long answer still needs the limit gone.
+        A program that owns its process (python -m foobar) lifts it once with anyDigits() when it
+        starts, and the runner's workers take on whatever limit their parent has.
+
+"""
+
+import decimal
+import importlib
+import importlib.util
+import json
+import os
+import sys
+
+PROBLEMS = ("dodge-the-lasers", "doomsday-fuel", "escape-pods", "fuel-injection-perfection", "running-with-bunnies")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class SolutionFinder:
+
+    @staticmethod
+    def find_spec(name, path=None, target=None):
+        problem = name[len("foobar."):].replace("_", "-")
+        if not name.startswith("foobar.") or problem not in PROBLEMS:
+            return None
+        return importlib.util.spec_from_file_location(name, os.path.join(ROOT, problem, "solution.py"))
+
+
+sys.meta_path.append(SolutionFinder)
+
+
+def load(problem):
+    if problem not in PROBLEMS:
+        raise ValueError("unknown problem %r, expected one of: %s" % (problem, ", ".join(PROBLEMS)))
+    return importlib.import_module("foobar." + problem.replace("-", "_"))
+
+
+def solve(problem, args, **options):
+    if isinstance(args, dict):
+        return load(problem).solution(**args, **options)
+    if not isinstance(args, list):
+        args = [args]
+    return load(problem).solution(*args, **options)
+
+
+def readInt(text):
+    return int(decimal.Decimal(text))
+
+
+def writeInt(n):
+    return str(decimal.Decimal(n))
+
+
+def loads(text):
+    return json.loads(text, parse_int=readInt)
+
+
+def digitLimit():
+    return sys.get_int_max_str_digits() if hasattr(sys, "get_int_max_str_digits") else 0
+
+
+def anyDigits(limit=0):
+    if hasattr(sys, "set_int_max_str_digits"): # older than 3.11, there's no limit
+        sys.set_int_max_str_digits(limit)
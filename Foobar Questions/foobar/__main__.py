@@ -0,0 +1,38 @@
+"""
+
+    python -m foobar <problem> [--workers N] [--algorithm NAME] [--cache FILE] < inputs.jsonl
+
+    Reads one JSON line of solution() arguments per call from stdin and streams the answers
+    to stdout (see foobar.runner). With --cache, repeated inputs are answered from an LRU and
+    from FILE, which keeps them for later runs (see foobar.cache).
+
+"""
+
+import argparse
+import sys
+
+from foobar import PROBLEMS, anyDigits
+from foobar.cache import Cache
+from foobar.runner import run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m foobar", description="Run a Foobar solver over JSON lines on stdin.")
+    parser.add_argument("problem", choices=PROBLEMS)
+    parser.add_argument("--workers", type=int, default=0, help="spread the calls over this many processes")
+    parser.add_argument("--algorithm", help="passed through to the solver's solution()")
+    parser.add_argument("--cache", metavar="FILE", help="reuse answers kept in this file, and keep new ones there")
+    parser.add_argument("--cache-size", type=int, default=1024, help="answers kept in memory per process")
+    args = parser.parse_args(argv)
+    anyDigits()
+    options = {"algorithm": args.algorithm} if args.algorithm else {}
+    cache = Cache(args.cache_size, args.cache) if args.cache else None
+    try:
+        run(args.problem, sys.stdin, sys.stdout, args.workers, cache, **options)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+
+    python -m foobar.bench [problem ...] [--algorithm NAME ...] [--sizes 4,8,16] [--output results.jsonl]
+                           [--baseline old.jsonl]
+
+    Sweeps each solver over growing inputs and writes one JSON line per (problem, algorithm,
+    size) run, so a new engine can be lined up against the original one and two runs of the
+    suite can be compared.
+
+    Inputs
+
+        Every problem has a generator that builds a random input of a given size from a seeded
+        random.Random, so the same seed and size always give the same input. The size means
+        digits for dodge-the-lasers and fuel-injection-perfection (the fuel sizes are kept under
+        Python's 4300 digit limit for int/str conversion, which dodge-the-lasers reads past),
+        states for doomsday-fuel, rooms for escape-pods and bunnies for running-with-bunnies.
+        The sizes step up slowly where the originals blow up, so the budget below catches them
+        before a single run takes hours.
+
+    measure()
+
+        Times the call (the best of --repeat runs), then runs it once more under tracemalloc for
+        the peak memory, and once more under sys.settrace() to count the work done inside the
+        solver's own file: "calls" for the functions called (a generator counts every time it
+        resumes) and "lines" for the lines run. The lines are what tell the engines apart, since
+        most of them do everything in a few loops and would all show the same handful of calls.
+        The counts don't depend on the machine or its load, so they are a steadier thing to
+        compare than the time. The counting and tracing passes are slow, so they are kept out of
+        the timed runs, and skipped entirely for a run that already went over the time budget.
+
+    sweep()
+
+        Goes through the sizes from small to large for every algorithm the problem knows about
+        (only the ones asked for with --algorithm, if any were), and stops growing an algorithm
+        as soon as one of its runs goes over --budget seconds or fails, so the factorial-time
+        originals don't hold up the rest of the suite. When numpy is installed, the
+        running-with-bunnies algorithms also run on backend="numpy" ("heldkarp-numpy" and so on),
+        the names the oracle uses for them too.
+
+    compare()
+
+        Matches runs up by (problem, algorithm, size) and reports every one that got slower,
+        used more memory or did more calls or lines than the baseline by more than --tolerance
+        times.
+
+"""
+
+import argparse
+import importlib.util
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from foobar import PROBLEMS, load, writeInt
+
+
+def dodgeInput(size, rng):
+    return [writeInt(rng.randrange(10 ** (size - 1), 10 ** size))]
+
+
+def doomsdayInput(size, rng):
+    terminals = max(1, size // 5)
+    m = [[0] * size for _ in range(size)]
+    for state in range(size - terminals):
+        for _ in range(3):
+            m[state][rng.randrange(size)] += rng.randrange(1, 10)
+        m[state][rng.randrange(size - terminals, size)] += rng.randrange(1, 10)
+    return [m]
+
+
+def escapeInput(size, rng):
+    m = [[0] * size for _ in range(size)]
+    for room in range(size):
+        for _ in range(4):
+            m[room][rng.randrange(size)] = rng.randrange(1, 2000001)
+        m[room][room] = 0
+    sides = max(1, size // 10)
+    return [list(range(sides)), list(range(size - sides, size)), m]
+
+
+def fuelInput(size, rng):
+    return [str(rng.randrange(10 ** (size - 1), 10 ** size))]
+
+
+def bunniesInput(size, rng):
+    times = [[0 if i == j else rng.randrange(1, 10) for j in range(size + 2)] for i in range(size + 2)]
+    return [times, rng.randrange(2 * size, 5 * size + 1)]
+
+
+GENERATORS = {
+    "dodge-the-lasers": dodgeInput,
+    "doomsday-fuel": doomsdayInput,
+    "escape-pods": escapeInput,
+    "fuel-injection-perfection": fuelInput,
+    "running-with-bunnies": bunniesInput,
+}
+
+SIZES = {
+    "dodge-the-lasers": [10, 100, 1000, 4000, 5000],
+    "doomsday-fuel": [4, 6, 8, 10, 11, 12, 16, 32, 64, 128],
+    "escape-pods": [10, 50, 100, 200, 500, 700, 1000],
+    "fuel-injection-perfection": [10, 100, 309, 1000, 4000],
+    "running-with-bunnies": [3, 5, 7, 8, 9, 10, 12, 15],
+}
+
+ALGORITHMS = {
+    "dodge-the-lasers": ["integer", "decimal"],
+    "doomsday-fuel": ["elimination", "sparse", "scc", "modular", "cofactor"],
+    "escape-pods": ["dinic", "push-relabel", "dfs"],
+    "fuel-injection-perfection": ["bits", "string"],
+    "running-with-bunnies": ["heldkarp", "branchbound", "permutations"],
+}
+
+OPTIONS = {}
+
+if importlib.util.find_spec("numpy") is not None:
+    for algorithm in ("heldkarp", "branchbound", "permutations"):
+        ALGORITHMS["running-with-bunnies"].append(algorithm + "-numpy")
+        OPTIONS[algorithm + "-numpy"] = {"algorithm": algorithm, "backend": "numpy"}
+
+
+def countOperations(module, call):
+    counts = {"calls": 0, "lines": 0}
+
+    def local(frame, event, arg):
+        if event == "line":
+            counts["lines"] += 1
+        return local
+
+    def trace(frame, event, arg):
+        if frame.f_code.co_filename != module.__file__:
+            return None
+        counts["calls"] += 1
+        return local
+
+    sys.settrace(trace)
+    try:
+        call()
+    finally:
+        sys.settrace(None)
+    return counts
+
+
+def measure(problem, algorithm, args, repeat=3, budget=None):
+    module = load(problem)
+
+    options = OPTIONS.get(algorithm, {"algorithm": algorithm})
+
+    def call():
+        return module.solution(*args, **options)
+
+    seconds = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        elapsed = time.perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+        if budget is not None and elapsed > budget:
+            return {"seconds": seconds, "peak_bytes": None, "calls": None, "lines": None}
+    tracemalloc.start()
+    try:
+        call()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return dict({"seconds": seconds, "peak_bytes": peak}, **countOperations(module, call))
+
+
+def sweep(problems, algorithms=None, sizes=None, seed=0, repeat=3, budget=2.0):
+    for problem in problems:
+        for algorithm in [name for name in ALGORITHMS[problem] if not algorithms or name in algorithms]:
+            for size in sizes or SIZES[problem]:
+                record = {"problem": problem, "algorithm": algorithm, "size": size, "seed": seed}
+                try:
+                    args = GENERATORS[problem](size, random.Random("%s:%d:%d" % (problem, seed, size)))
+                    record.update(measure(problem, algorithm, args, repeat, budget))
+                except Exception as error:
+                    record["error"] = "%s: %s" % (type(error).__name__, error)
+                yield record
+                if "error" in record or record["seconds"] > budget:
+                    break
+
+
+def compare(baseline, current, tolerance=1.25):
+    before = {(record["problem"], record["algorithm"], record["size"]): record for record in baseline}
+    regressions = []
+    for record in current:
+        old = before.get((record["problem"], record["algorithm"], record["size"]))
+        if old is None:
+            continue
+        for field in ("seconds", "peak_bytes", "calls", "lines"):
+            if old.get(field) and record.get(field) and record[field] > old[field] * tolerance:
+                regressions.append(dict(record, field=field, baseline=old[field]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m foobar.bench", description="Benchmark the Foobar solvers.")
+    parser.add_argument("problems", nargs="*", metavar="problem", help="any of: %s" % ", ".join(PROBLEMS))
+    parser.add_argument("--algorithm", action="append", dest="algorithms", help="benchmark only these (repeatable)")
+    parser.add_argument("--sizes", type=lambda text: [int(size) for size in text.split(",")])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=2.0, help="stop growing an algorithm past this many seconds")
+    parser.add_argument("--output", help="write the JSON lines here instead of stdout")
+    parser.add_argument("--baseline", help="JSON lines from an earlier run to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=1.25)
+    args = parser.parse_args(argv)
+    for problem in args.problems:
+        if problem not in PROBLEMS:
+            parser.error("unknown problem %r" % problem)
+    output = open(args.output, "w") if args.output else sys.stdout
+    records = []
+    try:
+        for record in sweep(args.problems or PROBLEMS, args.algorithms, args.sizes, args.seed, args.repeat, args.budget):
+            records.append(record)
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    if args.baseline:
+        with open(args.baseline) as lines:
+            baseline = [json.loads(line) for line in lines if line.strip()]
+        regressions = compare(baseline, records, args.tolerance)
+        for regression in regressions:
+            sys.stderr.write("regression: %s\n" % json.dumps(regression))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+
+    cache = Cache(maxsize=1024, path="answers.db")
+    cache.solve("doomsday-fuel", [m])
+
+    Remembers solver answers so a repeated input is answered without running the solver again.
+
+    key()
+
+        Binds the arguments to the solver's solution() signature, with its defaults filled in,
+        so solution(m) and solution(m, algorithm="elimination") are the same call, and then puts
+        them in a canonical form for their problem before hashing them:
+
+            dodge-the-lasers, fuel-injection-perfection: an int or a string of digits as a plain
+                decimal string, so "0042" and 42 are the same input. Anything else ("5.9",
+                "1e2") is keyed as it is, so the solver still gets to turn it down.
+            doomsday-fuel: every row divided by the gcd of its counts, since only the ratios
+                between them matter, so [0, 2, 4] and [0, 1, 2] are the same state.
+            escape-pods: the entrances and the exits sorted, since their order doesn't matter.
+            running-with-bunnies: left as it is.
+
+        The algorithm stays part of the key, so an answer is only ever reused for the engine it
+        came from.
+
+    Cache
+
+        Keeps the last maxsize answers in memory in an LRU, and, given a path, every answer in an
+        SQLite file too, so other processes (the runner's workers, or a later run) can answer
+        from it. The file is opened in WAL mode with memory-mapped reads, so lookups from many
+        processes don't block each other or copy the pages they read. Answers are stored as JSON
+        text, so every hit hands back a fresh copy that the caller is free to change. An answer
+        with a number too long to write out under Python's int digit limit (see
+        foobar.anyDigits()) is handed back without being kept. disksize bounds the file as well,
+        dropping the answers that were used the longest time ago.
+
+        Keeping track of when an answer was last used is a write, and only one process can write
+        at a time, so a hit only writes it down when the time stored is more than TOUCH_INTERVAL
+        seconds old. A hot answer is written down once a minute, not on every lookup, and a
+        lookup of an answer used within the last minute is a plain read. The price is that
+        disksize can be off by up to a minute about which answers were used last.
+
+"""
+
+import collections
+import hashlib
+import inspect
+import json
+import math
+import sqlite3
+import time
+
+from foobar import load, loads, solve, writeInt
+
+MMAP_SIZE = 1 << 28
+TOUCH_INTERVAL = 60
+
+
+def number(n):
+    if isinstance(n, int):
+        return writeInt(n)
+    if isinstance(n, str) and n.isascii() and n.strip().isdigit():
+        return n.strip().lstrip("0") or "0"
+    return n
+
+
+def rows(m):
+    out = []
+    for row in m:
+        content = math.gcd(*row)
+        out.append([cell // content for cell in row] if content > 1 else list(row))
+    return out
+
+
+CANONICAL = {
+    "dodge-the-lasers": {"s": number},
+    "doomsday-fuel": {"m": rows},
+    "escape-pods": {"entrances": sorted, "exits": sorted},
+    "fuel-injection-perfection": {"n": number},
+    "running-with-bunnies": {},
+}
+
+
+def key(problem, args, options=None):
+    if isinstance(args, dict):
+        args, kwargs = [], dict(args)
+    else:
+        args, kwargs = (args if isinstance(args, list) else [args]), {}
+    kwargs.update(options or {})
+    bound = inspect.signature(load(problem).solution).bind(*args, **kwargs)
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    for name, canonical in CANONICAL[problem].items():
+        arguments[name] = canonical(arguments[name])
+    text = json.dumps([problem, arguments], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class Cache:
+
+    def __init__(self, maxsize=1024, path=None, disksize=None):
+        self.maxsize = maxsize
+        self.path = path
+        self.disksize = disksize
+        self.memory = collections.OrderedDict()
+        self.db = None
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        # a connection can't cross into a worker process, so each process opens its own
+        return {"maxsize": self.maxsize, "path": self.path, "disksize": self.disksize}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def connect(self):
+        if self.db is None:
+            self.db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA mmap_size=%d" % MMAP_SIZE)
+            self.db.execute("CREATE TABLE IF NOT EXISTS answers (key TEXT PRIMARY KEY, answer TEXT NOT NULL, used REAL NOT NULL)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS answersUsed ON answers (used)")
+        return self.db
+
+    def remember(self, key, text):
+        self.memory[key] = text
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.maxsize:
+            self.memory.popitem(last=False)
+
+    def get(self, key):
+        text = self.memory.get(key)
+        if text is not None:
+            self.memory.move_to_end(key)
+        elif self.path is not None:
+            db = self.connect()
+            row = db.execute("SELECT answer, used FROM answers WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            text, used = row
+            now = time.time()
+            if now - used > TOUCH_INTERVAL:
+                db.execute("UPDATE answers SET used = ? WHERE key = ?", (now, key))
+            self.remember(key, text)
+        else:
+            return None
+        return text
+
+    def put(self, key, text):
+        self.remember(key, text)
+        if self.path is not None:
+            db = self.connect()
+            db.execute("INSERT OR REPLACE INTO answers VALUES (?, ?, ?)", (key, text, time.time()))
+            if self.disksize is not None:
+                db.execute("DELETE FROM answers WHERE key IN (SELECT key FROM answers ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                           (self.disksize,))
+
+    def solve(self, problem, args, **options):
+        answerKey = key(problem, args, options)
+        text = self.get(answerKey)
+        if text is not None:
+            self.hits += 1
+            return loads(text)
+        self.misses += 1
+        answer = solve(problem, args, **options)
+        try:
+            text = json.dumps(answer)
+        except ValueError: # too many digits to write out under this process's limit
+            return answer
+        self.put(answerKey, text)
+        return answer
+
+    def clear(self):
+        self.memory.clear()
+        if self.path is not None:
+            self.connect().execute("DELETE FROM answers")
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
@@ -0,0 +1,142 @@
+"""
+
+    with instrument("escape-pods", callback=report) as probe:
+        ...
+    probe.report()
+
+    Opt-in counters and timers for the solvers' hot paths. Nothing is measured outside of an
+    instrument() block: the solvers only hold a module level probe = None that their inner
+    loops check before counting anything, and their functions are the plain originals.
+
+    Inside the block every function listed in WATCHED (and solution() itself) is swapped for a
+    wrapper that counts its calls, keeps track of how deep it recurses, and adds up the time
+    spent in its outermost calls, so recursion isn't timed twice. The solvers call each other by
+    their module level names, so getD() recursing into getD() or solution() calling bigSum() goes
+    through the wrappers too. The inner loops count with probe.count(), for things that aren't a
+    function call of their own, like the augmenting paths of the flow engines or the nodes
+    branchAndBound() visits. Every name is kept as "<problem>.<name>".
+
+    Everything is put back the way it was when the block exits, even if it raises.
+
+    callback
+
+        Called after every outermost solution() call with a dict of what that one call cost: the
+        problem, its args and kwargs, and the counts, seconds and max_depth it added. That ties
+        the cost to the input that caused it, which the running totals of report() can't do.
+
+    Calls made in worker processes (the "parallel" algorithm and solution_batch() of
+    running-with-bunnies, or the runner with workers) are counted in those processes and are
+    not seen here.
+
+"""
+
+import collections
+import contextlib
+import functools
+import time
+
+from foobar import PROBLEMS, load
+
+WATCHED = {
+    "dodge-the-lasers": ["bigSum", "beattySum", "chainSum"],
+    "doomsday-fuel": ["getD", "getI", "eliminate", "getA0", "sparseEliminate", "sparseA0", "getComponents", "sccA0",
+                      "modFactor", "modSolve", "modularA0"],
+    "escape-pods": ["search", "updateResidual", "getNetwork", "addTerminals", "getLevels", "getMinCut"],
+    "fuel-injection-perfection": ["countSteps"],
+    "running-with-bunnies": ["floyd", "floydNumpy", "runPath", "getPath", "heldKarp", "branchAndBound"],
+}
+
+
+class Scope:
+
+    def __init__(self, probe, problem):
+        self.probe = probe
+        self.prefix = problem + "."
+
+    def count(self, name, amount=1):
+        self.probe.counts[self.prefix + name] += amount
+
+
+class Probe:
+
+    def __init__(self, callback=None):
+        self.counts = collections.Counter()
+        self.seconds = collections.defaultdict(float)
+        self.maxDepth = {}
+        self.depth = collections.Counter()
+        self.callback = callback
+
+    def wrap(self, problem, name, function):
+        key = problem + "." + name
+
+        @functools.wraps(function)
+        def watched(*args, **kwargs):
+            self.counts[key] += 1
+            self.depth[key] += 1
+            depth = self.depth[key]
+            if depth > self.maxDepth.get(key, 0):
+                self.maxDepth[key] = depth
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.depth[key] -= 1
+                if depth == 1:
+                    self.seconds[key] += time.perf_counter() - start
+
+        return watched
+
+    def wrapSolution(self, problem, function):
+        watched = self.wrap(problem, "solution", function)
+        key = problem + ".solution"
+
+        @functools.wraps(function)
+        def solution(*args, **kwargs):
+            if self.callback is None or self.depth[key]:
+                return watched(*args, **kwargs)
+            counts, seconds, maxDepth = self.counts.copy(), dict(self.seconds), self.maxDepth
+            self.maxDepth = {}
+            try:
+                return watched(*args, **kwargs)
+            finally:
+                call = self.maxDepth
+                self.maxDepth = maxDepth
+                for name, depth in call.items():
+                    if depth > maxDepth.get(name, 0):
+                        maxDepth[name] = depth
+                self.callback({
+                    "problem": problem,
+                    "args": args,
+                    "kwargs": kwargs,
+                    "counts": dict(self.counts - counts),
+                    "seconds": {name: total - seconds.get(name, 0.0) for name, total in self.seconds.items()
+                                if total != seconds.get(name, 0.0)},
+                    "max_depth": call,
+                })
+
+        return solution
+
+    def report(self):
+        return {"counts": dict(self.counts), "seconds": dict(self.seconds), "max_depth": dict(self.maxDepth)}
+
+
+@contextlib.contextmanager
+def instrument(*problems, callback=None):
+    probe = Probe(callback)
+    patched = []
+    try:
+        for problem in problems or PROBLEMS:
+            module = load(problem)
+            if hasattr(module, "probe"):
+                patched.append((module, "probe", module.probe))
+                module.probe = Scope(probe, problem)
+            for name in WATCHED[problem]:
+                if hasattr(module, name):
+                    patched.append((module, name, getattr(module, name)))
+                    setattr(module, name, probe.wrap(problem, name, getattr(module, name)))
+            patched.append((module, "solution", module.solution))
+            module.solution = probe.wrapSolution(problem, module.solution)
+        yield probe
+    finally:
+        for module, name, value in reversed(patched):
+            setattr(module, name, value)
@@ -0,0 +1,692 @@
+"""
+
+    python -m foobar.oracle [problem ...] [--algorithm NAME ...] [--trials 200] [--seed 0]
+                            [--output counterexamples.jsonl] [--start-method spawn]
+
+    Differential testing for the fast engines. Every problem gets random inputs inside the limits
+    its problem.txt gives, each input goes through the slow reference and through every fast
+    engine, and any engine that answers differently (or raises where the reference doesn't) is a
+    counterexample. The counterexample is shrunk to the smallest input that still tells the two
+    apart, and written out as one JSON line with the original input, the answers and the seed.
+    The exit status is 1 if anything was found.
+
+    References
+
+        The original solution of each problem is its reference wherever it is right, quirks
+        included, so an engine has to match it exactly: bigSum() ("decimal") in dodge-the-lasers,
+        the string walk in fuel-injection-perfection and, in running-with-bunnies, the lowest IDs
+        of the permutation search. solution() no longer runs the original Floyd-Warshall, so
+        original() keeps a copy of it here: the plain pass, the second pass of checkNegatives()
+        that marks the negative cycles, and the permutation search. That way the rewritten
+        floyd(), its numpy backend and checkNegatives() are checked too, and the solver's own
+        "permutations" is an engine like the others. Two of the originals aren't right, and those are
+        engines under test instead (only when asked for with --algorithm), checked against a
+        plain textbook version written out below that shares no code with the solver:
+
+            doomsday-fuel: absorption() inverts I - Q with Fractions by Gauss-Jordan, keeping the
+                [1, 1] answer solution() gives a 1 x 1 matrix. The cofactor inverse ("cofactor")
+                goes through floats and limit_denominator(), so any denominator over 10^6 comes
+                back as the wrong fraction, and when s0 is terminal it answers for the first
+                transient state instead.
+            escape-pods: edmondsKarp() is a max flow over the adjacency matrix. The original depth
+                first search ("dfs") loses or invents bunnies on corridors that lead back
+                towards an entrance.
+
+        An input the reference can't answer itself (it raises) says nothing about the engines, so
+        it's skipped. Besides the algorithms of solution(), the engines include the
+        running-with-bunnies algorithms on backend="numpy" ("heldkarp-numpy" and so on) when
+        numpy is installed.
+
+    CHECKS
+
+        The engines that don't answer one input at a time get inputs of their own, and a
+        reference built out of the one above:
+
+            batch: solution_batch() of dodge-the-lasers and running-with-bunnies, on batches of
+                2 to 50 numbers, sorted or not and some of them close together so the chains
+                chainSum() carries over actually get reused, or of 2 to 10 bunny instances. The
+                reference answers each input on its own.
+            batch-parallel: the same bunny instances through solution_batch(algorithm="parallel"),
+                so the batch's workers finish and shut down cleanly after a parallel run.
+            parallel-threads: the same bunny instances, each handed to solution() with
+                algorithm="parallel" from a thread of its own, all at once, so the calls share
+                parallelPath()'s pool. Every one of them has to give the answer it gives alone.
+            range: solution_range() of fuel-injection-perfection over a window [lo, lo + k)
+                with a small chunk, so the window crosses chunk boundaries and every level of
+                stepTable() fills more than one even and odd value.
+            network: an escape-pods FlowNetwork taken through a run of set_capacity(),
+                add_entrance() and add_exit() calls, with the flow after every one checked
+                against edmondsKarp() on the matrix as it stands by then, and the report() at
+                the end checked as below.
+            report, report-push-relabel: flowReport() on either engine. The flow has to match
+                edmondsKarp(), the min cut has to cut every entrance off from every exit and
+                add up to the flow, and the per-corridor flows have to fit their corridors and
+                add up in every room.
+
+    --start-method
+
+        Runs the process pools of running-with-bunnies ("parallel", "parallel-threads", "batch" and
+        "batch-parallel") with the given multiprocessing start method. spawn and forkserver workers
+        start from a fresh interpreter and have to import the solver by its foobar.<problem_name>
+        module name, which fork workers never do, so
+
+            python -m foobar.oracle running-with-bunnies --algorithm parallel --algorithm batch --start-method spawn
+
+        checks that the pools work on macOS, Windows and Python 3.14's Linux default too.
+
+    Inputs
+
+        Sizes lean towards the small end, where the quirks live and the permutation search stays
+        quick, but every size in the limits shows up now and then. The generators also make the
+        edge cases on purpose: a 1 x 1 doomsday matrix, a terminal s0, self loops, rooms no
+        entrance can reach, zero bunnies, negative cycles in the bunnies' times, and so on.
+
+    shrink()
+
+        Tries smaller versions of the input one at a time (a state, room or bunny taken out, a
+        count halved or zeroed, a number halved) and keeps the first one the engine still gets
+        wrong, until none of them do (or SHRINK_STEPS of them have been taken, since a number
+        that only goes wrong together with the rest of its batch can take a very long time to
+        shrink one at a time). Every candidate stays inside the problem's rules, so what comes
+        out is a real input that the engine gets wrong. Batches lose half of their inputs at
+        once, then one input, before the inputs themselves get smaller.
+
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import copy
+import fractions
+import functools
+import importlib.util
+import itertools
+import json
+import math
+import multiprocessing
+import random
+import sys
+
+from foobar import PROBLEMS, load
+
+
+def numberInput(rng, digits):
+    if rng.random() < 0.3:
+        return [str(rng.randrange(1, 101))]
+    size = rng.randrange(1, digits + 1)
+    return [str(rng.randrange(10 ** (size - 1), 10 ** size))]
+
+
+def numberShrinks(args):
+    n = int(args[0])
+    for smaller in (n // 10, n // 2, n - 1):
+        if 1 <= smaller < n:
+            yield [str(smaller)]
+
+
+def dodgeInput(rng):
+    return numberInput(rng, 101)
+
+
+def fuelInput(rng):
+    return numberInput(rng, 309)
+
+
+def settled(m):
+    done = set(state for state, row in enumerate(m) if not any(row))
+    changed = True
+    while changed:
+        changed = False
+        for state, row in enumerate(m):
+            if state not in done and any(row[col] for col in done):
+                done.add(state)
+                changed = True
+    return done
+
+
+def validChain(m):
+    return len(settled(m)) == len(m)
+
+
+def doomsdayInput(rng):
+    size = min(rng.randrange(1, 11), rng.randrange(1, 11))
+    if size == 1:
+        return [[[0]]]
+    terminals = rng.sample(range(1 if rng.random() < 0.9 else 0, size), rng.randrange(1, size))
+    m = [[0] * size for _ in range(size)]
+    for state in range(size):
+        if state not in terminals:
+            for col in range(size):
+                if rng.random() < 0.4:
+                    m[state][col] = rng.randrange(1, 10)
+    stuck = set(range(size)) - settled(m)
+    while stuck:
+        m[rng.choice(sorted(stuck))][rng.choice(terminals)] += rng.randrange(1, 10)
+        stuck = set(range(size)) - settled(m)
+    return [m]
+
+
+def doomsdayShrinks(args):
+    m = args[0]
+    for state in reversed(range(1, len(m))):
+        smaller = [row[:state] + row[state + 1:] for i, row in enumerate(m) if i != state]
+        if validChain(smaller):
+            yield [smaller]
+    for i, row in enumerate(m):
+        for j, cell in enumerate(row):
+            for value in (0, cell // 2):
+                if value < cell:
+                    smaller = [list(r) for r in m]
+                    smaller[i][j] = value
+                    if validChain(smaller):
+                        yield [smaller]
+
+
+def escapeInput(rng):
+    size = min(rng.randrange(2, 51), rng.randrange(2, 51))
+    rooms = rng.sample(range(size), size)
+    split = rng.randrange(1, size)
+    entrances = sorted(rooms[:rng.randrange(1, split + 1)])
+    exits = sorted(rooms[split:split + rng.randrange(1, size - split + 1)])
+    top = rng.choice([10, 2000000])
+    density = rng.random()
+    m = [[rng.randrange(1, top + 1) if i != j and rng.random() < density else 0 for j in range(size)]
+         for i in range(size)]
+    return [entrances, exits, m]
+
+
+def escapeShrinks(args):
+    entrances, exits, m = args
+    for room in reversed(range(len(m))):
+        if [room] == entrances or [room] == exits:
+            continue
+        renumber = lambda rooms: [r - (r > room) for r in rooms if r != room]
+        yield [renumber(entrances), renumber(exits),
+               [row[:room] + row[room + 1:] for i, row in enumerate(m) if i != room]]
+    for i, row in enumerate(m):
+        for j, cell in enumerate(row):
+            for value in (0, cell // 2):
+                if value < cell:
+                    smaller = [list(r) for r in m]
+                    smaller[i][j] = value
+                    yield [entrances, exits, smaller]
+
+
+def bunniesInput(rng):
+    bunnies = min(rng.randrange(0, 6), rng.randrange(0, 6)) if rng.random() < 0.2 else rng.randrange(1, 6)
+    low = rng.choice([0, -1, -3])
+    times = [[0 if i == j else rng.randrange(low, 10) for j in range(bunnies + 2)] for i in range(bunnies + 2)]
+    return [times, rng.choice([rng.randrange(0, 20), rng.randrange(0, 1000)])]
+
+
+def bunniesShrinks(args):
+    times, limit = args
+    for bunny in reversed(range(1, len(times) - 1)):
+        yield [[row[:bunny] + row[bunny + 1:] for i, row in enumerate(times) if i != bunny], limit]
+    for smaller in (limit // 2, limit - 1):
+        if 0 <= smaller < limit:
+            yield [times, smaller]
+    for i, row in enumerate(times):
+        for j, cell in enumerate(row):
+            if cell:
+                smaller = [list(r) for r in times]
+                smaller[i][j] = int(cell / 2)
+                yield [smaller, limit]
+
+
+def edmondsKarp(entrances, exits, path):
+    size = len(path) + 2
+    source, sink = size - 2, size - 1
+    infinite = sum(map(sum, path)) + 1
+    cap = [list(row) + [0, 0] for row in path] + [[0] * size, [0] * size]
+    for room in entrances:
+        cap[source][room] = infinite
+    for room in exits:
+        cap[room][sink] = infinite
+    flow = 0
+    while True:
+        parent = [None] * size
+        parent[source] = source
+        queue = collections.deque([source])
+        while queue and parent[sink] is None:
+            room = queue.popleft()
+            for other in range(size):
+                if cap[room][other] > 0 and parent[other] is None:
+                    parent[other] = room
+                    queue.append(other)
+        if parent[sink] is None:
+            return flow
+        bottleneck, room = infinite, sink
+        while room != source:
+            bottleneck = min(bottleneck, cap[parent[room]][room])
+            room = parent[room]
+        room = sink
+        while room != source:
+            cap[parent[room]][room] -= bottleneck
+            cap[room][parent[room]] += bottleneck
+            room = parent[room]
+        flow += bottleneck
+
+
+def absorption(m):
+    if len(m) == 1:
+        return [1, 1]
+    terminal = [state for state, row in enumerate(m) if not any(row)]
+    if 0 in terminal:
+        probs = [fractions.Fraction(int(state == 0)) for state in terminal]
+    else:
+        transient = [state for state, row in enumerate(m) if any(row)]
+        size = len(transient)
+        a = []
+        for i, state in enumerate(transient):
+            total = sum(m[state])
+            row = [fractions.Fraction(int(i == j)) - fractions.Fraction(m[state][other], total)
+                   for j, other in enumerate(transient)]
+            a.append(row + [fractions.Fraction(m[state][col], total) for col in terminal])
+        for k in range(size):
+            pivot = next(i for i in range(k, size) if a[i][k])
+            a[k], a[pivot] = a[pivot], a[k]
+            a[k] = [cell / a[k][k] for cell in a[k]]
+            for i in range(size):
+                if i != k and a[i][k]:
+                    a[i] = [cell - a[i][k] * lead for cell, lead in zip(a[i], a[k])]
+        probs = a[transient.index(0)][size:]
+    denom = math.lcm(*[prob.denominator for prob in probs])
+    return [int(prob * denom) for prob in probs] + [denom]
+
+
+def original(times, limit):
+    size = len(times)
+    memo = [list(row) for row in times]
+    for intermediate in range(size):
+        for i in range(size):
+            for j in range(size):
+                if memo[i][intermediate] + memo[intermediate][j] < memo[i][j]:
+                    memo[i][j] = memo[i][intermediate] + memo[intermediate][j]
+    for intermediate in range(size):
+        for i in range(size):
+            for j in range(size):
+                if memo[i][intermediate] + memo[intermediate][j] < memo[i][j]:
+                    memo[i][j] = float('-inf')
+    bestPath = []
+    for r in range(size - 1):
+        for path in itertools.permutations(range(1, size - 1), r):
+            time = sum(memo[a][b] for a, b in zip((0,) + path, path + (size - 1,)))
+            if time <= limit and len(path) > len(bestPath):
+                bestPath = path
+    return sorted(bunny - 1 for bunny in bestPath)
+
+
+def bunniesNumpy(algorithm):
+    def engine(times, limit):
+        return load("running-with-bunnies").solution(times, limit, algorithm=algorithm, backend="numpy")
+    return engine
+
+
+def dodgeBatchInput(rng):
+    size = min(rng.randrange(2, 51), rng.randrange(2, 51))
+    digits = rng.choice([10, 30, 101]) # bigSum() is slow, so not every batch goes all the way
+    if rng.random() < 0.5:
+        batch = [numberInput(rng, digits) for _ in range(size)]
+    else: # close together, so their chains run into each other early
+        base = int(numberInput(rng, digits)[0])
+        batch = [[str(base + rng.randrange(0, 100))] for _ in range(size)]
+    if rng.random() < 0.5:
+        batch.sort(key=lambda args: int(args[0]))
+    return [batch]
+
+
+def bunniesBatchInput(rng):
+    return [[bunniesInput(rng) for _ in range(rng.randrange(2, 11))]]
+
+
+def batchShrinks(problem):
+    def shrinks(args):
+        batch = args[0]
+        if len(batch) > 3:
+            yield [batch[:len(batch) // 2]]
+            yield [batch[len(batch) // 2:]]
+        for i in reversed(range(len(batch))):
+            if len(batch) > 1:
+                yield [batch[:i] + batch[i + 1:]]
+        for i, element in enumerate(batch):
+            for smaller in SHRINKS[problem](element):
+                yield [batch[:i] + [smaller] + batch[i + 1:]]
+    return shrinks
+
+
+def eachReference(problem):
+    @functools.lru_cache(maxsize=4096) # shrink() asks again for most of the same elements
+    def answer(text):
+        return solver(problem, REFERENCES[problem])(*json.loads(text))
+
+    def reference(batch):
+        return [copy.deepcopy(answer(json.dumps(args))) for args in batch]
+    return reference
+
+
+def dodgeBatch(batch):
+    return list(load("dodge-the-lasers").solution_batch([args[0] for args in batch]))
+
+
+def bunniesBatch(batch):
+    return list(load("running-with-bunnies").solution_batch([tuple(args) for args in batch], workers=2))
+
+
+def bunniesBatchParallel(batch):
+    return list(load("running-with-bunnies").solution_batch([tuple(args) for args in batch], algorithm="parallel",
+                                                            workers=2))
+
+
+def bunniesThreads(batch):
+    solution = load("running-with-bunnies").solution
+    with concurrent.futures.ThreadPoolExecutor(len(batch)) as pool:
+        return list(pool.map(lambda args: solution(*args, algorithm="parallel"), batch))
+
+
+def fuelRangeInput(rng):
+    lo = int(fuelInput(rng)[0]) if rng.random() < 0.8 else rng.randrange(1, 4)
+    return [lo, min(rng.randrange(1, 65), rng.randrange(1, 65)), rng.randrange(1, 20)]
+
+
+def fuelRangeShrinks(args):
+    lo, count, chunk = args
+    for smaller in (lo // 10, lo // 2, lo - 1):
+        if 1 <= smaller < lo:
+            yield [smaller, count, chunk]
+    for smaller in (count // 2, count - 1):
+        if 1 <= smaller < count:
+            yield [lo, smaller, chunk]
+    for smaller in (chunk // 2, chunk - 1):
+        if 1 <= smaller < chunk:
+            yield [lo, count, smaller]
+
+
+def fuelRangeReference(lo, count, chunk):
+    return [solver("fuel-injection-perfection", REFERENCES["fuel-injection-perfection"])(str(n))
+            for n in range(lo, lo + count)]
+
+
+def fuelRange(lo, count, chunk):
+    return [step for table in load("fuel-injection-perfection").solution_range(lo, lo + count, chunk) for step in table]
+
+
+def networkInput(rng):
+    entrances, exits, m = escapeInput(rng)
+    rooms = len(m)
+    free = sorted(set(range(rooms)) - set(entrances) - set(exits))
+    updates = []
+    for _ in range(rng.randrange(1, 11)):
+        if free and rng.random() < 0.15:
+            room = free.pop(rng.randrange(len(free)))
+            updates.append([rng.choice(["entrance", "exit"]), room])
+        else:
+            fromRoom, toRoom = rng.sample(range(rooms), 2)
+            capacity = rng.choice([0, m[fromRoom][toRoom] // 2, rng.randrange(1, 11), rng.randrange(1, 2000001)])
+            updates.append(["capacity", fromRoom, toRoom, capacity])
+    return [entrances, exits, m, updates]
+
+
+def networkShrinks(args):
+    entrances, exits, m, updates = args
+    for i in reversed(range(len(updates))):
+        yield [entrances, exits, m, updates[:i] + updates[i + 1:]]
+    for room in reversed(range(len(m))):
+        if [room] == entrances or [room] == exits:
+            continue
+        renumber = lambda rooms: [r - (r > room) for r in rooms if r != room]
+        kept = [[update[0]] + renumber(update[1:3]) + update[3:] for update in updates if room not in update[1:3]]
+        yield [renumber(entrances), renumber(exits),
+               [row[:room] + row[room + 1:] for i, row in enumerate(m) if i != room], kept]
+    for i, row in enumerate(m):
+        for j, cell in enumerate(row):
+            for value in (0, cell // 2):
+                if value < cell:
+                    smaller = [list(r) for r in m]
+                    smaller[i][j] = value
+                    yield [entrances, exits, smaller, updates]
+    for i, update in enumerate(updates):
+        if update[0] == "capacity" and update[3]:
+            yield [entrances, exits, m, updates[:i] + [update[:3] + [update[3] // 2]] + updates[i + 1:]]
+
+
+def applyUpdate(entrances, exits, paths, update):
+    if update[0] == "capacity":
+        paths[update[1]][update[2]] = update[3]
+    elif update[0] == "entrance":
+        entrances.append(update[1])
+    else:
+        exits.append(update[1])
+
+
+def cutCheck(entrances, exits, paths, report):
+    flow, flows, cut = report
+    cutSum = sum(paths[fromRoom][toRoom] for fromRoom, toRoom in cut)
+    cut = set(cut)
+    reached, stack = set(entrances), list(entrances)
+    while stack:
+        room = stack.pop()
+        for other, capacity in enumerate(paths[room]):
+            if capacity and (room, other) not in cut and other not in reached:
+                reached.add(other)
+                stack.append(other)
+    net = [0] * len(paths)
+    for (fromRoom, toRoom), carried in flows.items():
+        net[fromRoom] -= carried
+        net[toRoom] += carried
+    valid = (all(0 < carried <= paths[fromRoom][toRoom] for (fromRoom, toRoom), carried in flows.items())
+             and all(not net[room] for room in range(len(paths)) if room not in entrances and room not in exits)
+             and sum(net[room] for room in exits) == flow)
+    return [flow, cutSum, not reached & set(exits), valid]
+
+
+def networkReference(entrances, exits, paths, updates):
+    flows = [edmondsKarp(entrances, exits, paths)]
+    for update in updates:
+        applyUpdate(entrances, exits, paths, update)
+        flows.append(edmondsKarp(entrances, exits, paths))
+    return [flows, [flows[-1], flows[-1], True, True]]
+
+
+def networkUpdates(entrances, exits, paths, updates):
+    network = load("escape-pods").FlowNetwork(paths, entrances, exits)
+    flows = [network.flow]
+    paths = [list(row) for row in paths]
+    for update in updates:
+        if update[0] == "capacity":
+            flows.append(network.set_capacity(*update[1:]))
+        elif update[0] == "entrance":
+            flows.append(network.add_entrance(update[1]))
+        else:
+            flows.append(network.add_exit(update[1]))
+        applyUpdate(entrances, exits, paths, update)
+    return [flows, cutCheck(entrances, exits, paths, network.report())]
+
+
+def reportReference(entrances, exits, paths):
+    flow = edmondsKarp(entrances, exits, paths)
+    return [flow, flow, True, True]
+
+
+def flowReport(algorithm):
+    def engine(entrances, exits, paths):
+        return cutCheck(entrances, exits, paths, load("escape-pods").flowReport(entrances, exits, paths, algorithm))
+    return engine
+
+
+GENERATORS = {
+    "dodge-the-lasers": dodgeInput,
+    "doomsday-fuel": doomsdayInput,
+    "escape-pods": escapeInput,
+    "fuel-injection-perfection": fuelInput,
+    "running-with-bunnies": bunniesInput,
+}
+
+SHRINKS = {
+    "dodge-the-lasers": numberShrinks,
+    "doomsday-fuel": doomsdayShrinks,
+    "escape-pods": escapeShrinks,
+    "fuel-injection-perfection": numberShrinks,
+    "running-with-bunnies": bunniesShrinks,
+}
+
+REFERENCES = {
+    "dodge-the-lasers": "decimal",
+    "doomsday-fuel": "fractions",
+    "escape-pods": "edmonds-karp",
+    "fuel-injection-perfection": "string",
+    "running-with-bunnies": "original",
+}
+
+ENGINES = {
+    "dodge-the-lasers": ["integer", "batch"],
+    "doomsday-fuel": ["elimination", "sparse", "scc", "modular"],
+    "escape-pods": ["dinic", "push-relabel", "network", "report", "report-push-relabel"],
+    "fuel-injection-perfection": ["bits", "range"],
+    "running-with-bunnies": ["permutations", "heldkarp", "branchbound"],
+}
+
+OPTIONAL = {
+    "doomsday-fuel": ["cofactor"],
+    "escape-pods": ["dfs"],
+    "running-with-bunnies": ["parallel", "parallel-threads", "batch", "batch-parallel"],
+}
+
+EXTRAS = {
+    "doomsday-fuel": {"fractions": absorption},
+    "escape-pods": {"edmonds-karp": edmondsKarp},
+    "running-with-bunnies": {"original": original},
+}
+
+SHRINK_STEPS = 200
+
+# Engines that take their own kind of input: (generator, shrinks, reference, engine).
+CHECKS = {
+    "dodge-the-lasers": {
+        "batch": (dodgeBatchInput, batchShrinks("dodge-the-lasers"), eachReference("dodge-the-lasers"), dodgeBatch),
+    },
+    "escape-pods": {
+        "network": (networkInput, networkShrinks, networkReference, networkUpdates),
+        "report": (escapeInput, escapeShrinks, reportReference, flowReport("dinic")),
+        "report-push-relabel": (escapeInput, escapeShrinks, reportReference, flowReport("push-relabel")),
+    },
+    "fuel-injection-perfection": {
+        "range": (fuelRangeInput, fuelRangeShrinks, fuelRangeReference, fuelRange),
+    },
+    "running-with-bunnies": {
+        "batch": (bunniesBatchInput, batchShrinks("running-with-bunnies"), eachReference("running-with-bunnies"),
+                  bunniesBatch),
+        "batch-parallel": (bunniesBatchInput, batchShrinks("running-with-bunnies"),
+                           eachReference("running-with-bunnies"), bunniesBatchParallel),
+        "parallel-threads": (bunniesBatchInput, batchShrinks("running-with-bunnies"),
+                             eachReference("running-with-bunnies"), bunniesThreads),
+    },
+}
+
+if importlib.util.find_spec("numpy") is not None:
+    for algorithm in ("permutations", "heldkarp", "branchbound"):
+        ENGINES["running-with-bunnies"].append(algorithm + "-numpy")
+        EXTRAS["running-with-bunnies"][algorithm + "-numpy"] = bunniesNumpy(algorithm)
+
+
+def solver(problem, engine):
+    extra = EXTRAS.get(problem, {}).get(engine)
+    if extra is not None:
+        return extra
+    return lambda *args: load(problem).solution(*args, algorithm=engine)
+
+
+def attempt(function, args):
+    args = copy.deepcopy(args)
+    try:
+        return ["result", function(*args)]
+    except Exception as error:
+        return ["error", type(error).__name__]
+
+
+def run(problem, engine, args):
+    return attempt(solver(problem, engine), args)
+
+
+def check(problem, args, engines=None):
+    engines = engines or [name for name in ENGINES[problem] if name not in CHECKS.get(problem, {})]
+    mismatches = {}
+    plain = [name for name in engines if name not in CHECKS.get(problem, {})]
+    expected = run(problem, REFERENCES[problem], args) if plain else None
+    for engine in engines:
+        if engine in plain:
+            got = run(problem, engine, args)
+            if expected[0] != "error" and got != expected:
+                mismatches[engine] = (expected, got)
+        else:
+            generator, shrinks, reference, function = CHECKS[problem][engine]
+            own = attempt(reference, args)
+            got = attempt(function, args)
+            if own[0] != "error" and got != own:
+                mismatches[engine] = (own, got)
+    return mismatches
+
+
+def shrink(problem, args, engine, steps=SHRINK_STEPS):
+    shrinks = CHECKS[problem][engine][1] if engine in CHECKS.get(problem, {}) else SHRINKS[problem]
+    shrunk = True
+    while shrunk and steps:
+        shrunk = False
+        steps -= 1
+        for smaller in shrinks(args):
+            if check(problem, smaller, [engine]):
+                args, shrunk = smaller, True
+                break
+    return args
+
+
+def fuzz(problems, trials=200, seed=0, algorithms=None):
+    for problem in problems:
+        engines = ENGINES[problem]
+        if algorithms:
+            engines = [name for name in engines + OPTIONAL.get(problem, []) if name in algorithms]
+        own = [name for name in engines if name in CHECKS.get(problem, {})]
+        plain = [name for name in engines if name not in own]
+        groups = ([(None, plain)] if plain else []) + [(name, [name]) for name in own]
+        for name, group in groups:
+            generator = CHECKS[problem][name][0] if name else GENERATORS[problem]
+            rng = random.Random("%s:%d" % (problem, seed) if name is None else "%s:%s:%d" % (problem, name, seed))
+            for trial in range(trials):
+                args = generator(rng)
+                for engine in check(problem, args, group):
+                    smallest = shrink(problem, args, engine)
+                    expected, got = check(problem, smallest, [engine])[engine]
+                    yield {"problem": problem, "engine": engine, "reference": REFERENCES[problem], "seed": seed,
+                           "trial": trial, "args": smallest, "expected": expected, "got": got, "original": args}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m foobar.oracle", description="Check the fast engines against the references.")
+    parser.add_argument("problems", nargs="*", metavar="problem", help="any of: %s" % ", ".join(PROBLEMS))
+    parser.add_argument("--algorithm", action="append", dest="algorithms", help="check only these engines (repeatable)")
+    parser.add_argument("--trials", type=int, default=200, help="random inputs per problem")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="append the counterexamples here instead of writing them to stdout")
+    parser.add_argument("--start-method", choices=multiprocessing.get_all_start_methods(),
+                        help="start the solvers' worker processes this way")
+    args = parser.parse_args(argv)
+    if args.start_method:
+        multiprocessing.set_start_method(args.start_method, force=True)
+    for problem in args.problems:
+        if problem not in PROBLEMS:
+            parser.error("unknown problem %r" % problem)
+    output = open(args.output, "a") if args.output else sys.stdout
+    found = 0
+    try:
+        for record in fuzz(args.problems or PROBLEMS, args.trials, args.seed, args.algorithms):
+            found += 1
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+
+    Runs one solver over a stream of JSON lines. Each line holds the arguments for one call
+    to solution(): a JSON array of positional arguments, a JSON object of keyword arguments,
+    or a single bare value for solvers that take one argument. Each answer is written back
+    as its own JSON line as soon as it is ready, {"index": i, "result": ...}, where i is the
+    input's line number among the non-blank lines. If a call fails, or its answer can't be
+    written out as JSON, the line is {"index": i, "error": "..."} instead, and the rest of the
+    stream keeps going.
+
+    With workers > 0 the calls are spread over a process pool. Only a few calls per worker
+    are in flight at a time, so an endless stdin never piles up in memory, and answers come
+    out in whatever order they finish, which is why each line carries its index.
+
+    Given a foobar.cache.Cache, every call goes through it first. Each worker gets its own copy
+    of the cache, which shares answers with the others through the cache's file, if it has one,
+    and the same int digit limit as the process that started it (see foobar.anyDigits()).
+
+"""
+
+import concurrent.futures
+import json
+
+from foobar import anyDigits, digitLimit, loads, solve
+
+
+shared = None
+
+
+def setCache(cache):
+    global shared
+    shared = cache
+
+
+def setWorker(cache, limit):
+    anyDigits(limit)
+    setCache(cache)
+
+
+def solveLine(problem, options, index, line):
+    try:
+        solver = solve if shared is None else shared.solve
+        args = loads(line)
+        result = solver(problem, args, **options)
+        return json.dumps({"index": index, "result": result})
+    except Exception as error:
+        return json.dumps({"index": index, "error": "%s: %s" % (type(error).__name__, error)})
+
+
+def write(output, text):
+    output.write(text + "\n")
+    output.flush()
+
+
+def run(problem, lines, output, workers=0, cache=None, **options):
+    lines = (line for line in lines if line.strip())
+    if not workers:
+        setCache(cache)
+        try:
+            for index, line in enumerate(lines):
+                write(output, solveLine(problem, options, index, line))
+        finally:
+            setCache(None)
+        return
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer=setWorker,
+                                             initargs=(cache, digitLimit())) as pool:
+        pending = set()
+        for index, line in enumerate(lines):
+            pending.add(pool.submit(solveLine, problem, options, index, line))
+            if len(pending) >= 4 * workers:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    write(output, future.result())
+        for future in concurrent.futures.as_completed(pending):
+            write(output, future.result())
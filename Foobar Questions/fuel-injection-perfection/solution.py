@@ -27,9 +27,97 @@ EX
 100 4 chop off a zero
 10 2 chop off a zero
 1 All Done !
+
+The string version copies the whole binary string on every chop, and every +1 goes back and forth
+between a string and an integer, so on 309 digit inputs the loop turns quadratic. Doing the same
+moves on an integer doesn't fix that by itself, since every shift or +1 builds a whole new integer.
+countSteps() never changes n at all. It reads the bits of n once, lowest first, and only keeps
+track of where it is and whether a +1 is still carrying into the bit it's on. The number left at
+that point is the bits from there up plus the carry, so it is even when the bit matches the carry,
+and a whole run of those is a run of chops that str.find() skips over in one go. An odd number
+goes by the bit above it, exactly like the string version decides: 01 means subtract and 11 means
+add (except for 3 itself, where 3 -> 2 -> 1 is shorter). Either way it takes two steps (the add or
+subtract, then the chop), and the carry that's left over is just that bit above, so the step counts
+come out identical and every bit is looked at a constant number of times. solution() uses it
+unless it is asked for algorithm="string", the original walk.
+
+For a whole range of n there's no need to reduce every value on its own. Halving an even n always
+wins, and an odd n has to go to a neighbour first, so f(2k) = f(k) + 1 and
+f(2k + 1) = 1 + min(f(k) + 1, f(k + 1) + 1), which means any block of n only needs the block of
+n/2 below it. stepTable() halves the range it's asked for until it's down to a couple of small
+values, works those out with countSteps(), and then fills the levels back in from the bottom up.
+The halves are read straight out of the level below, so the evens and the odds are each filled
+with one slice assignment, and the table is an array of single bytes, since a number under 2^127
+never needs more than 255 steps (wider numbers get the narrowest type that fits twice their bits).
+solution_range() walks a range chunk by chunk and hands every chunk's table over as soon as it's
+done, so each one only ever holds a chunk and the halves under it, however long the range is.
 '''
 
-def solution(n):
+from array import array
+
+def countSteps(n):
+    bits = format(n, "b")[::-1] # lowest bit first
+    top = len(bits) - 1
+    steps = 0
+    i = 0
+    carry = "0"
+    while True:
+        j = bits.find("1" if carry == "0" else "0", i) # the next bit that leaves the number odd
+        if j == -1:
+            return steps + top + 1 - i # only the carry is left, so we're at 1
+        steps += j - i # chop the whole run off at once
+        i = j
+        if i == top:
+            return steps # the top bit and no carry, so we're at 1
+        if i == top - 1:
+            return steps + 2 # 3 -> 2 -> 1
+        carry = bits[i + 1] # add to clear a run of ones, subtract a lone one, then chop
+        steps += 2
+        i += 1
+
+
+def stepTable(lo, hi):
+    bound = 2 * hi.bit_length() # no number takes more steps than twice its bits
+    typecode = next(code for code in "BHILQ" if bound < 256 ** array(code).itemsize)
+    ranges = [(lo, hi)]
+    while ranges[-1][1] > 4:
+        start, stop = ranges[-1]
+        ranges.append((max(1, start // 2), (stop - 1) // 2 + 2))
+    start, stop = ranges.pop()
+    table = array(typecode, [countSteps(n) for n in range(start, stop)])
+    for lo, hi in reversed(ranges):
+        half, halfLo = table, start
+        table = array(typecode, bytes(hi - lo) * table.itemsize)
+        odd = max(3, lo | 1) # 1 is the one odd number with nowhere to go
+        even = lo + (lo & 1)
+        if even < hi:
+            k = even // 2 - halfLo
+            count = (hi - even + 1) // 2
+            table[even - lo::2] = array(typecode, [step + 1 for step in half[k:k + count]])
+        if odd < hi:
+            k = odd // 2 - halfLo
+            count = (hi - odd + 1) // 2
+            table[odd - lo::2] = array(typecode, [step + 2 for step in map(min, half[k:k + count], half[k + 1:k + 1 + count])])
+        start = lo
+    return table
+
+
+def solution_range(start, stop, chunk=1 << 20):
+    start, stop = int(start), int(stop)
+    if start < 1:
+        raise ValueError("the range has to start at 1 or above, not %d" % start)
+    for lo in range(start, stop, chunk):
+        yield stepTable(lo, min(lo + chunk, stop))
+
+
+ALGORITHMS = ("bits", "string")
+
+
+def solution(n, algorithm="bits"):
+    if algorithm not in ALGORITHMS:
+        raise ValueError("unknown algorithm %r, expected one of: %s" % (algorithm, ", ".join(ALGORITHMS)))
+    if algorithm == "bits":
+        return countSteps(int(n))
     n = int(n) # an integer is needed to convert to binary
     binary = format(n,"b") # binary conversion
     steps = 0; # counting variable
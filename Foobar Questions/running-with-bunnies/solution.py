@@ -42,26 +42,139 @@ Sources used:
             node to the bulkhead by iterating through the bunnyids in the path.
             After each new bunny is traversed, the time used up is tallied to
             compare with other paths.
+
+    heldKarp()
+
+        Going through every permutation of every length is about e * n! calls to runPath(), which
+        is hopeless past 7 or so bunnies. But the time a path takes from some bunny onwards only
+        depends on which bunnies are still left to grab and where we are, not on the order we
+        took the earlier ones in. So heldKarp() fills in finish[mask][b], the quickest way to start
+        at bunny b, pick up every bunny in mask (b included) and end at the bulkhead, building each
+        mask from the ones with one bunny fewer (Held-Karp). That is O(2^n * n^2) work, and tells us
+        the most bunnies we can save. To hand back the same bunnies as getPath(), we then rebuild
+        the first permutation (in itertools order) that saves that many: at each step we take the
+        lowest bunny we haven't grabbed yet that can still be finished off in time, using finish[][]
+        to check.
+
+    branchAndBound()
+
+        getPath() keeps going through permutations even after it has found one that saves every bunny,
+        and never gives up on a path that is already hopeless. branchAndBound() builds paths one bunny
+        at a time with a depth-first search, in the same order itertools hands them out, so the first
+        path it finds of any length is the one getPath() would keep. Since shorts[][] already holds
+        the shortest times, wherever we go next we still need at least shorts[current][bulkhead] to get
+        out, so as soon as the time so far plus that is over the limit nothing down this branch can
+        work and we back off. The same goes for each bunny left: if going to it and then straight out
+        is already too slow, it can't be part of anything down this branch. If grabbing every bunny
+        that is still possible can't beat the best path so far we back off too, and we stop the whole
+        search once a path saves everyone. Lastly, two paths that have picked up the same bunnies and
+        stand at the same spot can go on the exact same ways, so we remember the best time we've
+        reached each (bunnies taken, spot) pair with and drop any path that gets there no faster.
+        solution() uses it unless it is asked for another algorithm: "heldkarp", "parallel", or
+        "permutations" for the original getPath().
+
+    parallelPath() and solution_batch()
+
+        Every path starts with some first bunny, so parallelPath() cuts the first bunnies into one
+        run of neighbours per worker and has each worker run branchAndBound() over its own run, in
+        order, the way a single search would. A worker keeps one memo of (bunnies taken, spot) pairs
+        for its whole run: paths from different first bunnies keep landing on the same pairs, and
+        handing every first bunny to its own worker made each of them prove those pairs again,
+        which cost three to four times the work of a single search. Out of what comes back, the
+        longest path wins, and between paths of the same length the one from the lowest run wins,
+        which is exactly the path a single search in itertools order would have found first. The
+        workers' results come back in the order they were handed out, so the answer never depends
+        on which one finishes first.
+
+        The workers also share the best path found so far through shared memory, as the one number
+        length * (n + 1) + (n - first bunny) for n bunnies, which is bigger for whichever path would
+        win. A worker backs off from any branch whose best case (every bunny it can still reach,
+        behind its own first bunny) can't beat that number, so it has to find a longer path than a
+        lower first bunny already did, and only has to tie one from a higher first bunny. Once
+        nothing left in its run could beat the number, it stops. None of this ever cuts the path
+        that wins, so the answer is still the same.
+
+        The pool and its shared memory are started the first time they're needed and kept for
+        every call after that (a different number of workers starts a new one), so a call only pays
+        for the search. The pool is shut down when the process exits, through multiprocessing's own
+        exit hooks rather than atexit's, since a worker process (the runner's, say) never runs
+        atexit and would otherwise wait on its pool forever. A forked child starts without one.
+        Since the best path lives in that shared memory, two searches at once would cut each other's
+        branches, so calls from different threads take turns on the pool. With one worker there is
+        one run, and the search is the same as branchAndBound()'s own.
+
+        solution_batch() spreads whole (times, times_limit) instances over the workers instead and
+        yields their answers in input order. The instances are already spread out, so "parallel"
+        runs branchAndBound() in each worker, which finds the same path.
 """
 
+import concurrent.futures
+import functools
 import itertools as it
+import multiprocessing
+import multiprocessing.util
+import os
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Set by foobar.instrument, counts the nodes branchAndBound() visits.
+probe = None
 
+# Set in parallelPath()'s workers: the best path any shard has found so far, as a single number
+# (see parallelPath() above), and the lock that guards it.
+shared = None
 
-def floyd(memo):
+# parallelPath()'s pool, kept between calls: (workers, pool, shared), and the lock a call holds
+# while it uses them.
+workerPool = None
+poolLock = threading.Lock()
+
+
+BACKENDS = ("python", "numpy")
+
+
+def floyd(times, backend="python"):
+    if backend not in BACKENDS:
+        raise ValueError("unknown backend %r, expected one of: %s" % (backend, ", ".join(BACKENDS)))
+    if backend == "numpy":
+        return floydNumpy(times)
+    size = len(times)
+    memo = [list(row) for row in times]
     for intermediate in range(size):
+        through = memo[intermediate]
         for i in range(size):
+            row = memo[i]
+            toIntermediate = row[intermediate]
             for j in range(size):
-                if memo[i][intermediate] + memo[intermediate][j] < memo[i][j]:
-                    memo[i][j] = memo[i][intermediate] + memo[intermediate][j]
+                if toIntermediate + through[j] < row[j]:
+                    row[j] = toIntermediate + through[j]
     return checkNegatives(memo)
 
 
+def floydNumpy(times):
+    if np is None:
+        raise ImportError("the numpy backend needs numpy installed")
+    memo = np.array(times, dtype=float)
+    for intermediate in range(len(memo)):
+        np.minimum(memo, memo[:, intermediate, None] + memo[None, intermediate, :], out=memo)
+    for intermediate in np.flatnonzero(np.diag(memo) < 0):
+        memo[np.ix_(memo[:, intermediate] < np.inf, memo[intermediate, :] < np.inf)] = -np.inf
+    return [[int(cell) if np.isfinite(cell) else float(cell) for cell in row] for row in memo]
+
+
 def checkNegatives(memo):
+    size = len(memo)
     for intermediate in range(size):
-        for i in range(size):
-            for j in range(size):
-                if memo[i][intermediate] + memo[intermediate][j] < memo[i][j]:
-                    memo[i][j] = float('-inf')
+        if memo[intermediate][intermediate] < 0:
+            for i in range(size):
+                if memo[i][intermediate] < float('inf'):
+                    for j in range(size):
+                        if memo[intermediate][j] < float('inf'):
+                            memo[i][j] = float('-inf')
     return memo
 
 
@@ -71,12 +184,12 @@ def runPath(shorts, path):
         next = bunny + 1
         time += shorts[start][next]
         start = next
-    time += shorts[start][size - 1]
+    time += shorts[start][len(shorts) - 1]
     return time
 
 
 def getPath(shorts, limit):
-    bunnies = range(size - 2)
+    bunnies = range(len(shorts) - 2)
     allPaths = it.chain.from_iterable(it.permutations(bunnies, r) for r in range(len(bunnies) + 1))
     bestPath = []
     for path in allPaths:
@@ -86,8 +199,159 @@ def getPath(shorts, limit):
     return bestPath
 
 
-def solution(times, times_limit):
-    global size
-    size = len(times)
-    shorts = floyd(times)
+def heldKarp(shorts, limit):
+    bunnies = len(shorts) - 2
+    bulkhead = len(shorts) - 1
+    members = [[b for b in range(bunnies) if mask >> b & 1] for mask in range(1 << bunnies)]
+    finish = [[0] * bunnies for _ in range(1 << bunnies)]
+    for mask in range(1, 1 << bunnies):
+        for b in members[mask]:
+            rest = mask ^ (1 << b)
+            if rest:
+                after = finish[rest]
+                fromB = shorts[b + 1]
+                finish[mask][b] = min(fromB[c + 1] + after[c] for c in members[rest])
+            else:
+                finish[mask][b] = shorts[b + 1][bulkhead]
+    bySize = [[] for _ in range(bunnies + 1)]
+    for mask in range(1 << bunnies):
+        bySize[len(members[mask])].append(mask)
+    most = 0
+    for count in range(bunnies, 0, -1):
+        if any(shorts[0][b + 1] + finish[mask][b] <= limit for mask in bySize[count] for b in members[mask]):
+            most = count
+            break
+    path = []
+    taken = time = start = 0
+    for left in range(most, 0, -1):
+        for b in range(bunnies):
+            if taken >> b & 1:
+                continue
+            best = min(finish[mask][b] for mask in bySize[left] if mask >> b & 1 and not mask & taken)
+            if time + shorts[start][b + 1] + best <= limit:
+                path.append(b)
+                taken |= 1 << b
+                time += shorts[start][b + 1]
+                start = b + 1
+                break
+    return tuple(path)
+
+
+def branchAndBound(shorts, limit, firsts=None):
+    bunnies = len(shorts) - 2
+    bulkhead = len(shorts) - 1
+    best = []
+    seen = {}
+    bounds = shared if firsts is not None else None
+
+    def rank(length, first):
+        return length * (bunnies + 1) + bunnies - first
+
+    def search(path, taken, time, start):
+        nonlocal best
+        if probe:
+            probe.count("searchNodes")
+        if time + shorts[start][bulkhead] > limit:
+            return False
+        if len(path) > len(best):
+            best = list(path)
+            if bounds:
+                record, lock = bounds
+                with lock:
+                    record.value = max(record.value, rank(len(best), best[0]))
+            if len(best) == bunnies:
+                return True
+        if seen.get((taken, start), float('inf')) <= time:
+            return False
+        seen[(taken, start)] = time
+        reachable = [bunny for bunny in range(bunnies) if not taken >> bunny & 1
+                     and time + shorts[start][bunny + 1] + shorts[bunny + 1][bulkhead] <= limit]
+        if len(path) + len(reachable) <= len(best):
+            return False
+        if bounds and rank(len(path) + len(reachable), path[0]) <= bounds[0].value:
+            return False
+        for bunny in reachable:
+            path.append(bunny)
+            done = search(path, taken | 1 << bunny, time + shorts[start][bunny + 1], bunny + 1)
+            path.pop()
+            if done:
+                return True
+        return False
+
+    if firsts is None:
+        search([], 0, 0, 0)
+    else:
+        for first in firsts:
+            if bounds and rank(bunnies, first) <= bounds[0].value: # a lower first bunny can't be beaten any more
+                break
+            if search([first], 1 << first, shorts[0][first + 1], first + 1):
+                break
+    return tuple(best)
+
+
+def shareBounds(record, lock):
+    global shared
+    shared = (record, lock)
+
+
+def closePool():
+    with poolLock:
+        if workerPool is not None:
+            workerPool[1].shutdown()
+
+
+def forgetPool():
+    global workerPool, poolLock
+    workerPool = None
+    poolLock = threading.Lock()
+
+
+def parallelPath(shorts, limit, workers=None):
+    global workerPool
+    workers = workers or os.cpu_count() or 1
+    with poolLock:
+        if workerPool is None or workerPool[0] != workers:
+            if workerPool is not None:
+                workerPool[1].shutdown()
+            bounds = (multiprocessing.RawValue("q", -1), multiprocessing.Lock())
+            workerPool = (workers, concurrent.futures.ProcessPoolExecutor(workers, initializer=shareBounds,
+                                                                          initargs=bounds), bounds)
+        pool, (record, lock) = workerPool[1:]
+        record.value = -1
+        bunnies = len(shorts) - 2
+        chunks = [range(bunnies * i // workers, bunnies * (i + 1) // workers) for i in range(workers)]
+        paths = list(pool.map(functools.partial(branchAndBound, shorts, limit), chunks))
+    bestPath = ()
+    for path in paths:
+        if len(path) > len(bestPath):
+            bestPath = path
+    return bestPath
+
+
+multiprocessing.util.Finalize(None, closePool, exitpriority=100) # before the pool's own queues close
+os.register_at_fork(after_in_child=forgetPool)
+
+
+ALGORITHMS = ("branchbound", "heldkarp", "parallel", "permutations")
+
+
+def solution(times, times_limit, algorithm="branchbound", backend="python"):
+    if algorithm not in ALGORITHMS:
+        raise ValueError("unknown algorithm %r, expected one of: %s" % (algorithm, ", ".join(ALGORITHMS)))
+    shorts = floyd(times, backend)
+    if algorithm == "heldkarp":
+        return sorted(list(heldKarp(shorts, times_limit)))
+    if algorithm == "branchbound":
+        return sorted(list(branchAndBound(shorts, times_limit)))
+    if algorithm == "parallel":
+        return sorted(list(parallelPath(shorts, times_limit)))
     return sorted(list(getPath(shorts, times_limit)))
+
+
+def solution_batch(instances, algorithm="branchbound", workers=None):
+    instances = list(instances)
+    if algorithm == "parallel":
+        algorithm = "branchbound"
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        yield from pool.map(functools.partial(solution, algorithm=algorithm),
+                            [times for times, limit in instances], [limit for times, limit in instances])